@@ -1,11 +1,19 @@
+import asyncio
 import flet as ft
-from datetime import datetime, time, date, timedelta
+from datetime import time, date, timedelta
 from enum import Enum
-from typing import List, Optional, Tuple, Dict
-import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 import json
 from dataclasses import dataclass, asdict
+from collections import OrderedDict
 from pathlib import Path
+from db_connection import ConnectionManager
+from db_executor import DBExecutor
+from decoders import format_time, parse_date, parse_time
+from migrations import Migrator, V1_SPLIT_VERSION
+from history import AttendanceHistory, HistoryRow
+from holiday_calendar import Holiday, HolidayCalendar, HolidayProvider
+from startup_timer import StartupTimer
 
 
 # Data Models
@@ -35,8 +43,13 @@ class AttendanceCounts:
     required_percentage: float
 
 
+# Records are slotted: a multi-year history is hundreds of thousands of them, and a
+# per-instance __dict__ roughly doubles their size. They stay mutable because the
+# Today tab updates class_status in place; bulk history goes in history.AttendanceHistory.
 @dataclass
 class AttendanceRecordHybrid:
+    __slots__ = ("course_name", "course_id", "start_time", "end_time", "class_status", "date")
+
     course_name: str
     course_id: int
     start_time: time
@@ -46,6 +59,8 @@ class AttendanceRecordHybrid:
 
 
 class ScheduledClass(AttendanceRecordHybrid):
+    __slots__ = ("attendance_id", "schedule_id")
+
     def __init__(self, attendance_id: Optional[int], schedule_id: Optional[int],
                  course_id: int, course_name: str, start_time: time, end_time: time,
                  class_status: CourseClassStatus, record_date: date):
@@ -55,6 +70,8 @@ class ScheduledClass(AttendanceRecordHybrid):
 
 
 class ExtraClass(AttendanceRecordHybrid):
+    __slots__ = ("extra_class_id",)
+
     def __init__(self, extra_class_id: int, course_id: int, course_name: str,
                  start_time: time, end_time: time, class_status: CourseClassStatus, record_date: date):
         super().__init__(course_name, course_id, start_time, end_time, class_status, record_date)
@@ -73,244 +90,543 @@ class CourseDetailsOverallItem:
     unsets: int
 
 
+# Triggers that keep course_stats in step with every write to attendance.
+# An UPDATE moves the row out of its old status (and course) and into the new one.
+# The counter rows are created with NOT EXISTS rather than INSERT OR IGNORE: an
+# upsert on attendance would override the trigger's OR IGNORE and fail instead.
+COURSE_STATS_TRIGGERS = [
+    '''
+    CREATE TRIGGER IF NOT EXISTS course_stats_on_course_insert AFTER INSERT ON courses
+    BEGIN
+        INSERT INTO course_stats (course_id) SELECT NEW.id
+        WHERE NOT EXISTS (SELECT 1 FROM course_stats WHERE course_id = NEW.id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS course_stats_on_attendance_insert AFTER INSERT ON attendance
+    BEGIN
+        INSERT INTO course_stats (course_id) SELECT NEW.course_id
+        WHERE NOT EXISTS (SELECT 1 FROM course_stats WHERE course_id = NEW.course_id);
+        UPDATE course_stats SET
+            presents = presents + (NEW.class_status = 'Present'),
+            absents = absents + (NEW.class_status = 'Absent'),
+            cancels = cancels + (NEW.class_status = 'Cancelled'),
+            unsets = unsets + (NEW.class_status = 'Unset')
+        WHERE course_id = NEW.course_id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS course_stats_on_attendance_delete AFTER DELETE ON attendance
+    BEGIN
+        UPDATE course_stats SET
+            presents = presents - (OLD.class_status = 'Present'),
+            absents = absents - (OLD.class_status = 'Absent'),
+            cancels = cancels - (OLD.class_status = 'Cancelled'),
+            unsets = unsets - (OLD.class_status = 'Unset')
+        WHERE course_id = OLD.course_id;
+    END
+    ''',
+    '''
+    CREATE TRIGGER IF NOT EXISTS course_stats_on_attendance_update
+    AFTER UPDATE OF class_status, course_id ON attendance
+    BEGIN
+        UPDATE course_stats SET
+            presents = presents - (OLD.class_status = 'Present'),
+            absents = absents - (OLD.class_status = 'Absent'),
+            cancels = cancels - (OLD.class_status = 'Cancelled'),
+            unsets = unsets - (OLD.class_status = 'Unset')
+        WHERE course_id = OLD.course_id;
+        INSERT INTO course_stats (course_id) SELECT NEW.course_id
+        WHERE NOT EXISTS (SELECT 1 FROM course_stats WHERE course_id = NEW.course_id);
+        UPDATE course_stats SET
+            presents = presents + (NEW.class_status = 'Present'),
+            absents = absents + (NEW.class_status = 'Absent'),
+            cancels = cancels + (NEW.class_status = 'Cancelled'),
+            unsets = unsets + (NEW.class_status = 'Unset')
+        WHERE course_id = NEW.course_id;
+    END
+    ''',
+]
+
+COURSE_STATS_TRIGGER_NAMES = [
+    "course_stats_on_course_insert",
+    "course_stats_on_attendance_insert",
+    "course_stats_on_attendance_delete",
+    "course_stats_on_attendance_update",
+]
+
+
 # Database Operations
 class DBOps:
-    def __init__(self, db_path: str = "attendance.db"):
+    def __init__(self, db_path: str = "attendance.db", pool_readers: bool = False,
+                 holiday_provider: Optional[HolidayProvider] = None):
         self.db_path = db_path
+        self.db = ConnectionManager(db_path, pool_readers=pool_readers)
+        self.migrator = Migrator(self.db)
+        # A flat v1 attendance table has to be moved aside before ours is created
+        self.migrator.run(V1_SPLIT_VERSION)
         self.init_database()
 
+        # Cached locally; the provider is only asked once the cache goes stale, see fetch_holidays
+        self.holidays = HolidayCalendar(self.db, holiday_provider)
+
+        # Importing v1 history is done in small batches in the background so the UI stays responsive
+        self.migrator.start()
+
+    def close(self):
+        # An unfinished import resumes from its last batch next time
+        self.migrator.stop()
+        self.db.close()
+
+    def holiday_range(self) -> Tuple[date, date]:
+        today = date.today()
+        return today - timedelta(days=366), today + timedelta(days=366)
+
+    def fetch_holidays(self) -> Optional[List[Holiday]]:
+        # May go over the network, so it runs on a reader thread; None if the cache is fresh
+        return self.holidays.fetch(*self.holiday_range())
+
+    def save_holidays(self, holidays: List[Holiday]):
+        # Runs on the writer thread
+        self.holidays.save(*self.holiday_range(), holidays)
+
     def init_database(self):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        # Create tables
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS courses (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                required_attendance_percentage REAL NOT NULL
-            )
-        ''')
-
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS schedule (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                course_id INTEGER NOT NULL,
-                weekday INTEGER NOT NULL,
-                start_time TEXT NOT NULL,
-                end_time TEXT NOT NULL,
-                included_in_schedule INTEGER DEFAULT 1,
-                FOREIGN KEY (course_id) REFERENCES courses (id)
-            )
-        ''')
-
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS attendance (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                schedule_id INTEGER,
-                extra_class_id INTEGER,
-                date TEXT NOT NULL,
-                class_status TEXT NOT NULL,
-                course_id INTEGER NOT NULL,
-                FOREIGN KEY (schedule_id) REFERENCES schedule (id),
-                FOREIGN KEY (course_id) REFERENCES courses (id)
-            )
-        ''')
-
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS extra_classes (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                course_id INTEGER NOT NULL,
-                date TEXT NOT NULL,
-                start_time TEXT NOT NULL,
-                end_time TEXT NOT NULL,
-                class_status TEXT NOT NULL,
-                FOREIGN KEY (course_id) REFERENCES courses (id)
-            )
-        ''')
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'course_stats'")
+            stats_existed = cursor.fetchone() is not None
+
+            # Create tables
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS courses (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    required_attendance_percentage REAL NOT NULL
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS schedule (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    course_id INTEGER NOT NULL,
+                    weekday INTEGER NOT NULL,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT NOT NULL,
+                    included_in_schedule INTEGER DEFAULT 1,
+                    FOREIGN KEY (course_id) REFERENCES courses (id)
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS attendance (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    schedule_id INTEGER,
+                    extra_class_id INTEGER,
+                    date TEXT NOT NULL,
+                    class_status TEXT NOT NULL,
+                    course_id INTEGER NOT NULL,
+                    FOREIGN KEY (schedule_id) REFERENCES schedule (id),
+                    FOREIGN KEY (course_id) REFERENCES courses (id)
+                )
+            ''')
+
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS extra_classes (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    course_id INTEGER NOT NULL,
+                    date TEXT NOT NULL,
+                    start_time TEXT NOT NULL,
+                    end_time TEXT NOT NULL,
+                    class_status TEXT NOT NULL,
+                    FOREIGN KEY (course_id) REFERENCES courses (id)
+                )
+            ''')
+
+            # Indexes for the Today view, the per-course aggregates and date lookups
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_attendance_course ON attendance (course_id, class_status, schedule_id, extra_class_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_schedule_weekday ON schedule (weekday, course_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_extra_classes_date ON extra_classes (date, course_id)")
+            # An extra class is marked through a single attendance row, like a scheduled one
+            cursor.execute('''
+                CREATE UNIQUE INDEX IF NOT EXISTS idx_attendance_extra_class
+                ON attendance (extra_class_id, date) WHERE extra_class_id IS NOT NULL
+            ''')
+            # Keyset pagination over history in (date, id) order; id is the rowid, so it's already in both
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_attendance_date ON attendance (date)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_attendance_course_date ON attendance (course_id, date)")
+
+            # Per-course counters, kept in sync with attendance by triggers so
+            # reading a course's percentage is a primary key lookup
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS course_stats (
+                    course_id INTEGER PRIMARY KEY,
+                    presents INTEGER NOT NULL DEFAULT 0,
+                    absents INTEGER NOT NULL DEFAULT 0,
+                    cancels INTEGER NOT NULL DEFAULT 0,
+                    unsets INTEGER NOT NULL DEFAULT 0,
+                    FOREIGN KEY (course_id) REFERENCES courses (id)
+                )
+            ''')
+            # Recreated every time so existing databases pick up changes to them
+            for name in COURSE_STATS_TRIGGER_NAMES:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {name}")
+            for trigger in COURSE_STATS_TRIGGERS:
+                cursor.execute(trigger)
+
+            # One row per scheduled class and date, so marking can be an upsert. Databases
+            # from before the constraint can hold duplicates from quick repeated swipes:
+            # keep the latest of each (the delete trigger takes the rest out of course_stats)
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_attendance_slot_date'")
+            if cursor.fetchone() is None:
+                cursor.execute('''
+                    DELETE FROM attendance
+                    WHERE schedule_id IS NOT NULL AND id NOT IN (
+                        SELECT MAX(id) FROM attendance WHERE schedule_id IS NOT NULL GROUP BY schedule_id, date
+                    )
+                ''')
+                # Superseded by the unique index
+                cursor.execute("DROP INDEX IF EXISTS idx_attendance_schedule_date")
+                cursor.execute("CREATE UNIQUE INDEX idx_attendance_slot_date ON attendance (schedule_id, date)")
 
-        conn.commit()
-        conn.close()
+            # Databases created before course_stats existed need their counters filled in
+            if not stats_existed:
+                self.rebuild_stats()
 
     def create_course(self, name: str, required_attendance_percentage: float,
                       schedule: List[ClassDetail]) -> int:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute(
-            "INSERT INTO courses (name, required_attendance_percentage) VALUES (?, ?)",
-            (name, required_attendance_percentage)
-        )
-        course_id = cursor.lastrowid
-
-        for class_detail in schedule:
             cursor.execute(
-                "INSERT INTO schedule (course_id, weekday, start_time, end_time, included_in_schedule) VALUES (?, ?, ?, ?, ?)",
-                (course_id, class_detail.day_of_week,
-                 class_detail.start_time.strftime("%H:%M"),
-                 class_detail.end_time.strftime("%H:%M"),
-                 1 if class_detail.included_in_schedule else 0)
+                "INSERT INTO courses (name, required_attendance_percentage) VALUES (?, ?)",
+                (name, required_attendance_percentage)
             )
+            course_id = cursor.lastrowid
+
+            for class_detail in schedule:
+                cursor.execute(
+                    "INSERT INTO schedule (course_id, weekday, start_time, end_time, included_in_schedule) VALUES (?, ?, ?, ?, ?)",
+                    (course_id, class_detail.day_of_week,
+                     format_time(class_detail.start_time),
+                     format_time(class_detail.end_time),
+                     1 if class_detail.included_in_schedule else 0)
+                )
 
-        conn.commit()
-        conn.close()
-        return course_id
+            return course_id
 
     def get_schedule_and_extra_classes_for_today(self) -> List[Tuple[AttendanceRecordHybrid, AttendanceCounts]]:
-        today = date.today()
-        weekday = today.weekday()
-
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        # Get scheduled classes for today
-        cursor.execute('''
-            SELECT a.id, s.id, c.id, c.name, s.start_time, s.end_time, a.class_status, a.date
-            FROM courses c
-            JOIN schedule s ON c.id = s.course_id
-            LEFT JOIN attendance a ON s.id = a.schedule_id AND a.date = ?
-            WHERE s.weekday = ?
-        ''', (today.isoformat(), weekday))
-
-        scheduled_classes = []
-        for row in cursor.fetchall():
-            attendance_id, schedule_id, course_id, course_name, start_time_str, end_time_str, class_status_str, date_str = row
-
-            start_time = datetime.strptime(start_time_str, "%H:%M").time()
-            end_time = datetime.strptime(end_time_str, "%H:%M").time()
-            class_status = CourseClassStatus(class_status_str) if class_status_str else CourseClassStatus.UNSET
-            record_date = datetime.strptime(date_str, "%Y-%m-%d").date() if date_str else today
-
-            scheduled_class = ScheduledClass(
-                attendance_id, schedule_id, course_id, course_name,
-                start_time, end_time, class_status, record_date
-            )
-
-            # Get attendance counts
-            counts = self._get_course_attendance_percentage(course_id)
-            scheduled_classes.append((scheduled_class, counts))
+        classes = self.get_classes_for_today()
 
-        # Get extra classes for today
-        cursor.execute('''
-            SELECT ec.id, c.id, c.name, ec.start_time, ec.end_time, ec.class_status, ec.date
-            FROM courses c
-            JOIN extra_classes ec ON c.id = ec.course_id
-            WHERE ec.date = ?
-        ''', (today.isoformat(),))
+        # Attendance counts for every course on the page in one query
+        counts = self.get_attendance_counts_bulk({item.course_id for item in classes})
+        return [(item, counts[item.course_id]) for item in classes]
 
-        extra_classes = []
-        for row in cursor.fetchall():
+    def get_classes_for_today(self) -> List[AttendanceRecordHybrid]:
+        # Today's classes, latest first, without their counts
+        today = date.today()
+        classes = self.get_classes_for_range(today, today).get(today, [])
+        classes.sort(key=lambda item: item.start_time, reverse=True)
+        return classes
+
+    def get_classes_for_range(self, start: date, end: date) -> Dict[date, List[AttendanceRecordHybrid]]:
+        """Every class from start to end (inclusive), grouped by date and sorted by
+        start time. The weekly schedule is expanded in memory and merged with the
+        attendance and extra classes in the range, so this is three queries however
+        long the range is. Dates without classes are left out."""
+        if end < start:
+            return {}
+
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+
+            # The weekly timetable, by weekday
+            cursor.execute('''
+                SELECT s.id, c.id, c.name, s.weekday, s.start_time, s.end_time
+                FROM courses c
+                JOIN schedule s ON c.id = s.course_id
+                ORDER BY s.start_time
+            ''')
+            slots_by_weekday: Dict[int, List[Tuple]] = {}
+            for schedule_id, course_id, course_name, weekday, start_time_str, end_time_str in cursor.fetchall():
+                slots_by_weekday.setdefault(weekday, []).append(
+                    (schedule_id, course_id, course_name, parse_time(start_time_str), parse_time(end_time_str)))
+
+            # Classes already marked in the range
+            cursor.execute('''
+                SELECT id, schedule_id, date, class_status
+                FROM attendance
+                WHERE date BETWEEN ? AND ? AND schedule_id IS NOT NULL
+            ''', (start.isoformat(), end.isoformat()))
+            marked = {(schedule_id, date_str): (attendance_id, class_status_str)
+                      for attendance_id, schedule_id, date_str, class_status_str in cursor.fetchall()}
+
+            # The status lives in attendance; extra_classes keeps the one it was created with
+            cursor.execute('''
+                SELECT ec.id, c.id, c.name, ec.start_time, ec.end_time, COALESCE(a.class_status, ec.class_status), ec.date
+                FROM courses c
+                JOIN extra_classes ec ON c.id = ec.course_id
+                LEFT JOIN attendance a ON a.extra_class_id = ec.id AND a.date = ec.date
+                WHERE ec.date BETWEEN ? AND ?
+            ''', (start.isoformat(), end.isoformat()))
+            extra_rows = cursor.fetchall()
+
+        classes: Dict[date, List[AttendanceRecordHybrid]] = {}
+        day = start
+        while day <= end:
+            # Regular classes don't run on holidays
+            slots = () if self.holidays.is_holiday(day) else slots_by_weekday.get(day.weekday(), ())
+            day_str = day.isoformat()
+            for schedule_id, course_id, course_name, start_time, end_time in slots:
+                attendance_id, class_status_str = marked.get((schedule_id, day_str), (None, None))
+                class_status = CourseClassStatus(class_status_str) if class_status_str else CourseClassStatus.UNSET
+                classes.setdefault(day, []).append(ScheduledClass(
+                    attendance_id, schedule_id, course_id, course_name,
+                    start_time, end_time, class_status, day
+                ))
+            day += timedelta(days=1)
+
+        for row in extra_rows:
             extra_class_id, course_id, course_name, start_time_str, end_time_str, class_status_str, date_str = row
-
-            start_time = datetime.strptime(start_time_str, "%H:%M").time()
-            end_time = datetime.strptime(end_time_str, "%H:%M").time()
-            class_status = CourseClassStatus(class_status_str)
-            record_date = datetime.strptime(date_str, "%Y-%m-%d").date()
-
-            extra_class = ExtraClass(
+            record_date = parse_date(date_str)
+            classes.setdefault(record_date, []).append(ExtraClass(
                 extra_class_id, course_id, course_name,
-                start_time, end_time, class_status, record_date
-            )
-
-            counts = self._get_course_attendance_percentage(course_id)
-            extra_classes.append((extra_class, counts))
-
-        conn.close()
+                parse_time(start_time_str), parse_time(end_time_str),
+                CourseClassStatus(class_status_str), record_date
+            ))
 
-        # Combine and sort by start time
-        all_classes = scheduled_classes + extra_classes
-        all_classes.sort(key=lambda x: x[0].start_time, reverse=True)
-        return all_classes
+        for items in classes.values():
+            items.sort(key=lambda item: item.start_time)
+        return dict(sorted(classes.items()))
 
     def _get_course_attendance_percentage(self, course_id: int) -> AttendanceCounts:
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute('''
-            SELECT 
-                SUM(CASE WHEN class_status = 'Present' THEN 1 ELSE 0 END) as presents,
-                SUM(CASE WHEN class_status = 'Absent' THEN 1 ELSE 0 END) as absents,
-                SUM(CASE WHEN class_status = 'Cancelled' THEN 1 ELSE 0 END) as cancels,
-                SUM(CASE WHEN class_status = 'Unset' THEN 1 ELSE 0 END) as unsets,
-                required_attendance_percentage
-            FROM courses c
-            LEFT JOIN (
-                SELECT schedule_id, class_status, course_id FROM attendance WHERE schedule_id IS NOT NULL
-                UNION ALL
-                SELECT extra_class_id, class_status, course_id FROM attendance WHERE extra_class_id IS NOT NULL
-            ) a ON c.id = a.course_id
-            WHERE c.id = ?
-            GROUP BY c.id
-        ''', (course_id,))
-
-        row = cursor.fetchone()
-        conn.close()
-
-        if row and row[0] is not None:
-            presents, absents, cancels, unsets, required_percentage = row
-            total = presents + absents
-            percent = 100.0 if total == 0 else (presents / total) * 100
-            return AttendanceCounts(percent, presents, absents, cancels, unsets, required_percentage)
-        else:
-            return AttendanceCounts(100.0, 0, 0, 0, 0, 75.0)
+        return self.get_attendance_counts_bulk([course_id])[course_id]
+
+    def get_attendance_counts_bulk(self, course_ids: Iterable[int]) -> Dict[int, AttendanceCounts]:
+        course_ids = list(dict.fromkeys(course_ids))
+        if not course_ids:
+            return {}
+
+        placeholders = ", ".join("?" * len(course_ids))
+        with self.db.reader() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute(f'''
+                SELECT c.id, s.presents, s.absents, s.cancels, s.unsets, c.required_attendance_percentage
+                FROM courses c
+                LEFT JOIN course_stats s ON c.id = s.course_id
+                WHERE c.id IN ({placeholders})
+            ''', course_ids)
+
+            rows = {row[0]: row[1:] for row in cursor.fetchall()}
+
+        counts = {}
+        for course_id in course_ids:
+            row = rows.get(course_id)
+            if row and row[0] is not None:
+                presents, absents, cancels, unsets, required_percentage = row
+                total = presents + absents
+                percent = 100.0 if total == 0 else (presents / total) * 100
+                counts[course_id] = AttendanceCounts(percent, presents, absents, cancels, unsets, required_percentage)
+            elif row:
+                counts[course_id] = AttendanceCounts(100.0, 0, 0, 0, 0, row[4])
+            else:
+                counts[course_id] = AttendanceCounts(100.0, 0, 0, 0, 0, 75.0)
+        return counts
+
+    def iter_attendance(self, course_id: Optional[int] = None, start: Optional[date] = None,
+                        end: Optional[date] = None, batch_size: int = 500) -> Iterator[HistoryRow]:
+        """Attendance rows in (date, id) order, optionally for one course and a date
+        range. Rows are read a page at a time with keyset pagination, so memory stays
+        flat however long the history is, and the connection is only held while a
+        page is fetched."""
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be at least 1, got {batch_size}")
+        conditions = ["(date, id) > (?, ?)"]
+        params: List = []
+        if course_id is not None:
+            conditions.append("course_id = ?")
+            params.append(course_id)
+        if start is not None:
+            conditions.append("date >= ?")
+            params.append(start.isoformat())
+        if end is not None:
+            conditions.append("date <= ?")
+            params.append(end.isoformat())
+        where = " AND ".join(conditions)
+        sql = f'''
+            SELECT id, course_id, schedule_id, extra_class_id, date, class_status
+            FROM attendance
+            WHERE {where}
+            ORDER BY date, id
+            LIMIT ?
+        '''
+
+        last_date, last_id = "", 0
+        while True:
+            with self.db.reader() as conn:
+                rows = conn.execute(sql, (last_date, last_id, *params, batch_size)).fetchall()
+            for attendance_id, cid, schedule_id, extra_class_id, date_str, class_status in rows:
+                yield HistoryRow(attendance_id, cid, schedule_id, extra_class_id, parse_date(date_str), class_status)
+            if len(rows) < batch_size:
+                return
+            last_date, last_id = rows[-1][4], rows[-1][0]
+
+    def get_attendance_history(self, course_id: Optional[int] = None, start: Optional[date] = None,
+                               end: Optional[date] = None) -> AttendanceHistory:
+        # The same rows in columnar form for analytics
+        return AttendanceHistory.from_rows(self.iter_attendance(course_id, start, end))
+
+    def rebuild_stats(self) -> List[int]:
+        # Recompute course_stats from scratch; returns the ids of courses whose
+        # counters had drifted from the attendance table (empty when consistent)
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+
+            fresh = {course_id: (0, 0, 0, 0) for (course_id,) in cursor.execute("SELECT id FROM courses")}
+            cursor.execute('''
+                SELECT
+                    course_id,
+                    SUM(CASE WHEN class_status = 'Present' THEN 1 ELSE 0 END),
+                    SUM(CASE WHEN class_status = 'Absent' THEN 1 ELSE 0 END),
+                    SUM(CASE WHEN class_status = 'Cancelled' THEN 1 ELSE 0 END),
+                    SUM(CASE WHEN class_status = 'Unset' THEN 1 ELSE 0 END)
+                FROM attendance
+                GROUP BY course_id
+            ''')
+            for row in cursor.fetchall():
+                fresh[row[0]] = tuple(row[1:])
+
+            cursor.execute("SELECT course_id, presents, absents, cancels, unsets FROM course_stats")
+            stored = {row[0]: tuple(row[1:]) for row in cursor.fetchall()}
+
+            drifted = sorted(course_id for course_id in fresh.keys() | stored.keys()
+                             if fresh.get(course_id) != stored.get(course_id))
+            if drifted:
+                cursor.execute("DELETE FROM course_stats")
+                cursor.executemany(
+                    "INSERT INTO course_stats (course_id, presents, absents, cancels, unsets) VALUES (?, ?, ?, ?, ?)",
+                    [(course_id, *counts) for course_id, counts in fresh.items()]
+                )
+
+        return drifted
 
     def mark_attendance_for_schedule_class(self, attendance_id: Optional[int],
                                            class_status: CourseClassStatus,
                                            schedule_id: Optional[int],
                                            record_date: date, course_id: int):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        if attendance_id:
-            cursor.execute(
-                "UPDATE attendance SET class_status = ? WHERE id = ?",
-                (class_status.value, attendance_id)
-            )
-        else:
-            cursor.execute(
-                "INSERT INTO attendance (schedule_id, date, class_status, course_id) VALUES (?, ?, ?, ?)",
-                (schedule_id, record_date.isoformat(), class_status.value, course_id)
-            )
-
-        conn.commit()
-        conn.close()
+        # Keyed on (schedule_id, date), so repeated marks update the one row whether or not
+        # the caller has seen its attendance_id yet; the argument is kept for existing callers
+        with self.db.transaction() as conn:
+            conn.execute('''
+                INSERT INTO attendance (schedule_id, date, class_status, course_id) VALUES (?, ?, ?, ?)
+                ON CONFLICT (schedule_id, date) DO UPDATE SET class_status = excluded.class_status
+            ''', (schedule_id, record_date.isoformat(), class_status.value, course_id))
 
     def mark_attendance_for_extra_class(self, extra_class_id: int, status: CourseClassStatus):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # Recorded in attendance so extra classes count towards course_stats like any other class
+        with self.db.transaction() as conn:
+            cursor = conn.cursor()
+
+            cursor.execute('''
+                INSERT INTO attendance (extra_class_id, date, class_status, course_id)
+                SELECT id, date, ?, course_id FROM extra_classes WHERE id = ?
+                ON CONFLICT (extra_class_id, date) WHERE extra_class_id IS NOT NULL
+                DO UPDATE SET class_status = excluded.class_status
+            ''', (status.value, extra_class_id))
 
-        cursor.execute(
-            "UPDATE extra_classes SET class_status = ? WHERE id = ?",
-            (status.value, extra_class_id)
-        )
 
-        conn.commit()
-        conn.close()
+@dataclass
+class ClassCardControls:
+    # The controls of a Today card that change when its attendance is marked
+    detector: ft.GestureDetector
+    card: ft.Card
+    title: ft.Text
+    progress: ft.ProgressBar
+    percent_label: ft.Text
+    status_chip: ft.Container
 
 
 # Main Application
 class AttendanceTrackerApp:
-    def __init__(self):
-        self.db_ops = DBOps()
+    # Placeholder cards on the first frame, and courses per counts query while streaming
+    SKELETON_CARDS = 3
+    COUNTS_CHUNK = 8
+
+    def __init__(self, db_path: str = "attendance.db", startup: Optional[StartupTimer] = None):
+        self.startup = startup or StartupTimer()
+        # Handlers hand database work to the executor: writes run one at a time on its
+        # writer thread, reads on its reader threads with their own WAL connections
+        self.db_ops = DBOps(db_path, pool_readers=True)
+        self.io = DBExecutor()
         self.current_tab = 0
-        self.today_items = []
+        # Today's classes in display order keyed like the card registry, plus
+        # the latest counts per course shared by every card of that course
+        self.today_items: "OrderedDict[Tuple[str, int, date], AttendanceRecordHybrid]" = OrderedDict()
+        self.course_counts: Dict[int, AttendanceCounts] = {}
+        self.course_cards: Dict[int, List[Tuple[str, int, date]]] = {}
+        self.cards: Dict[Tuple[str, int, date], ClassCardControls] = {}
+        self.classes_list = None
         self.user_name = "Rudra Agrawal"
         self.page = None
+        self.startup.mark("database ready")
 
     def main(self, page: ft.Page):
+        self._setup_page(page)
+
+        # Initialize with some sample data
+        self._add_sample_data()
+        self._load_today_items()
+
+        self._build_layout(self._build_today_tab())
+        self.startup.mark("first frame")
+        self._refresh_holidays()
+
+    async def main_async(self, page: ft.Page):
+        """Async entry point: paints a skeleton straight away, then loads Today on the
+        DB executor's threads and streams the cards in, their percentages last"""
+        self._setup_page(page)
+        self._build_layout(self._build_today_tab(skeleton_cards=self.SKELETON_CARDS))
+        self.startup.mark("first frame")
+
+        # Initialize with some sample data
+        await self.io.write(self._add_sample_data)
+        classes = await self.io.read(self.db_ops.get_classes_for_today)
+
+        self._set_today_items((item, None) for item in classes)
+        self.content_area.content = self._build_today_tab()
+        page.update()
+        self.startup.mark("cards")
+
+        # Counts come in per chunk of courses, on the reader threads, and are patched in as they land
+        course_ids = list(dict.fromkeys(item.course_id for item in classes))
+        chunks = [self.io.read(self.db_ops.get_attendance_counts_bulk, course_ids[i:i + self.COUNTS_CHUNK])
+                  for i in range(0, len(course_ids), self.COUNTS_CHUNK)]
+        for chunk in asyncio.as_completed(chunks):
+            patched = []
+            for course_id, counts in (await chunk).items():
+                # A swipe that has already landed has fresher counts
+                if course_id not in self.course_counts:
+                    self.course_counts[course_id] = counts
+                    patched += self._patch_percent(course_id, counts)
+            # Only the patched controls are diffed and sent, not the whole list
+            page.update(*patched)
+        self.startup.mark("attendance")
+        self.startup.report()
+        self._refresh_holidays()
+
+    def _setup_page(self, page: ft.Page):
         self.page = page
         page.title = "Self Attendance Tracker"
         page.theme_mode = ft.ThemeMode.DARK
         page.padding = 0
         page.spacing = 0
+        page.on_close = lambda e: self.close()
 
-        # Initialize with some sample data
-        self._add_sample_data()
-        self.today_items = self.db_ops.get_schedule_and_extra_classes_for_today()
-
+    def _build_layout(self, today_tab: ft.Control):
         # Create main content
         self.content_area = ft.Container(
-            content=self._build_today_tab(),
+            content=today_tab,
             expand=True
         )
 
@@ -348,7 +664,7 @@ class AttendanceTrackerApp:
         )
 
         # Main layout
-        page.add(
+        self.page.add(
             ft.Column([
                 self.content_area,
                 bottom_nav
@@ -356,9 +672,9 @@ class AttendanceTrackerApp:
             self.fab
         )
 
-        page.update()
+        self.page.update()
 
-    def _build_today_tab(self):
+    def _build_today_tab(self, skeleton_cards: int = 0):
         # Greeting section
         greeting = ft.Column([
             ft.Text(
@@ -381,10 +697,20 @@ class AttendanceTrackerApp:
             spacing=12,
             expand=True
         )
+        self.classes_list = classes_list
+        self.cards = {}
 
-        for item, counts in self.today_items:
-            card = self._create_class_card(item, counts)
+        for item in self.today_items.values():
+            card = self._create_class_card(item, self.course_counts.get(item.course_id))
             classes_list.controls.append(card)
+        # Grey stand-ins while Today is still loading
+        for _ in range(skeleton_cards):
+            classes_list.controls.append(ft.Container(
+                height=120,
+                bgcolor=ft.Colors.with_opacity(0.08, ft.Colors.ON_SURFACE_VARIANT),
+                border_radius=ft.border_radius.all(12),
+                margin=ft.margin.only(bottom=12)
+            ))
 
         return ft.Container(
             content=ft.Column([
@@ -401,21 +727,47 @@ class AttendanceTrackerApp:
             expand=True
         )
 
-    def _create_class_card(self, item: AttendanceRecordHybrid, counts: AttendanceCounts):
+    def _create_class_card(self, item: AttendanceRecordHybrid, counts: Optional[AttendanceCounts]):
+        # Without counts yet, the progress bar spins until _patch_percent fills it in
         is_marked = item.class_status != CourseClassStatus.UNSET
 
+        title = ft.Text(
+            item.course_name,
+            size=20,
+            weight=ft.FontWeight.W_600,
+            color=ft.Colors.ON_SURFACE_VARIANT if is_marked else ft.Colors.ON_SURFACE,
+            expand=True
+        )
+        progress = ft.ProgressBar(
+            value=counts.percent / 100.0 if counts else None,
+            color=ft.Colors.PRIMARY,
+            bgcolor=ft.Colors.SURFACE
+        )
+        percent_label = ft.Text(
+            f"{int(counts.percent)}% attendance" if counts else "",
+            size=14,
+            color=ft.Colors.ON_SURFACE_VARIANT
+        )
+        # Always present so a status change only has to toggle it
+        status_chip = ft.Container(
+            content=ft.Text(
+                item.class_status.value,
+                size=12,
+                color=ft.Colors.WHITE,
+                weight=ft.FontWeight.W_500
+            ),
+            bgcolor=self._get_status_color(item.class_status),
+            padding=ft.padding.all(8),
+            border_radius=ft.border_radius.all(20),
+            visible=is_marked
+        )
+
         # Card content
         card_content = ft.Container(
             content=ft.Column([
                 # Header row
                 ft.Row([
-                    ft.Text(
-                        item.course_name,
-                        size=20,
-                        weight=ft.FontWeight.W_600,
-                        color=ft.Colors.ON_SURFACE_VARIANT if is_marked else ft.Colors.ON_SURFACE,
-                        expand=True
-                    ),
+                    title,
                     ft.Text(
                         f"{item.start_time.strftime('%H:%M')} - {item.end_time.strftime('%H:%M')}",
                         size=14,
@@ -426,48 +778,73 @@ class AttendanceTrackerApp:
                 ft.Divider(height=10, color=ft.Colors.TRANSPARENT),
 
                 # Progress bar
-                ft.ProgressBar(
-                    value=counts.percent / 100.0,
-                    color=ft.Colors.PRIMARY,
-                    bgcolor=ft.Colors.SURFACE
-                ),
+                progress,
 
                 ft.Divider(height=10, color=ft.Colors.TRANSPARENT),
 
                 # Footer row
                 ft.Row([
-                    ft.Text(
-                        f"{int(counts.percent)}% attendance",
-                        size=14,
-                        color=ft.Colors.ON_SURFACE_VARIANT
-                    ),
-                    ft.Container() if not is_marked else ft.Container(
-                        content=ft.Text(
-                            item.class_status.value,
-                            size=12,
-                            color=ft.Colors.WHITE,
-                            weight=ft.FontWeight.W_500
-                        ),
-                        bgcolor=self._get_status_color(item.class_status),
-                        padding=ft.padding.all(8),
-                        border_radius=ft.border_radius.all(20)
-                    )
+                    percent_label,
+                    status_chip
                 ], alignment=ft.MainAxisAlignment.SPACE_BETWEEN)
             ]),
             padding=ft.padding.all(16)
         )
 
+        card = ft.Card(
+            content=card_content,
+            color=self._get_card_color(item.class_status),
+            elevation=2,
+            margin=ft.margin.only(bottom=12)
+        )
+
         # Create swipeable card
-        return ft.GestureDetector(
-            content=ft.Card(
-                content=card_content,
-                color=self._get_card_color(item.class_status),
-                elevation=2,
-                margin=ft.margin.only(bottom=12)
-            ),
+        detector = ft.GestureDetector(
+            content=card,
             on_pan_end=self._on_swipe_end(item, counts)
         )
 
+        # Keep hold of the parts a status change touches, so it can patch them in place
+        self.cards[self._card_key(item)] = ClassCardControls(detector, card, title, progress, percent_label, status_chip)
+        return detector
+
+    def _card_key(self, item: AttendanceRecordHybrid) -> Tuple[str, int, date]:
+        if isinstance(item, ExtraClass):
+            return ("extra", item.extra_class_id, item.date)
+        return ("schedule", item.schedule_id, item.date)
+
+    def _patch_card(self, item: AttendanceRecordHybrid, counts: Optional[AttendanceCounts]):
+        controls = self.cards.get(self._card_key(item))
+        if controls is None:
+            self._refresh_ui()
+            return
+
+        if counts is not None:
+            self._patch_percent(item.course_id, counts)
+
+        is_marked = item.class_status != CourseClassStatus.UNSET
+        controls.title.color = ft.Colors.ON_SURFACE_VARIANT if is_marked else ft.Colors.ON_SURFACE
+        controls.card.color = self._get_card_color(item.class_status)
+        controls.status_chip.visible = is_marked
+        controls.status_chip.content.value = item.class_status.value
+        controls.status_chip.bgcolor = self._get_status_color(item.class_status)
+
+        # Move to bottom of list; only the list and this card's changes are sent to the client
+        self.classes_list.controls.remove(controls.detector)
+        self.classes_list.controls.append(controls.detector)
+        self.classes_list.update()
+
+    def _patch_percent(self, course_id: int, counts: AttendanceCounts) -> List[ft.Control]:
+        # Every card of the course shows the new percentage; returns the controls changed
+        patched = []
+        for key in self.course_cards.get(course_id, ()):
+            other = self.cards.get(key)
+            if other is not None:
+                other.progress.value = counts.percent / 100.0
+                other.percent_label.value = f"{int(counts.percent)}% attendance"
+                patched += (other.progress, other.percent_label)
+        return patched
+
     def _get_status_color(self, status: CourseClassStatus):
         if status == CourseClassStatus.PRESENT:
             return ft.Colors.GREEN
@@ -498,23 +875,72 @@ class AttendanceTrackerApp:
         return handle_swipe
 
     def _mark_attendance(self, item: AttendanceRecordHybrid, status: CourseClassStatus):
+        # Update the item status and move it to the bottom of the list straight away;
+        # the course's counts follow once the write has landed
+        item.class_status = status
+        self.today_items.move_to_end(self._card_key(item))
+        self._patch_card(item, self.course_counts.get(item.course_id))
+
+        future = self.io.submit_write(self._write_attendance, item, status)
+        self.io.on_result(future, self.page, lambda counts: self._apply_counts(item, counts),
+                          on_error=lambda error: self._reload_today(error))
+
+    def _write_attendance(self, item: AttendanceRecordHybrid, status: CourseClassStatus) -> AttendanceCounts:
+        # Runs on the writer thread
         if isinstance(item, ScheduledClass):
             self.db_ops.mark_attendance_for_schedule_class(
                 item.attendance_id, status, item.schedule_id, item.date, item.course_id
             )
         elif isinstance(item, ExtraClass):
             self.db_ops.mark_attendance_for_extra_class(item.extra_class_id, status)
+        return self._get_updated_counts(item)
 
-        # Update the item status
-        item.class_status = status
-
-        # Move to bottom of list
-        self.today_items.remove((item, self._get_updated_counts(item)))
-        self.today_items.append((item, self._get_updated_counts(item)))
-
-        # Refresh the UI
+    def _apply_counts(self, item: AttendanceRecordHybrid, counts: AttendanceCounts):
+        # Refresh the course's counts once for all its cards; the card itself was already patched
+        self.course_counts[item.course_id] = counts
+        self._patch_percent(item.course_id, counts)
+        if self.page:
+            self.classes_list.update()
+
+    def _refresh_holidays(self):
+        # After the first frame: a stale cache is refetched and Today reloaded if it changed
+        self.io.on_result(self.io.submit_read(self._fetch_holidays), self.page,
+                          lambda fetched: fetched and self._reload_today())
+
+    def _fetch_holidays(self) -> bool:
+        # On a reader thread; the cache is written on the writer thread
+        holidays = self.db_ops.fetch_holidays()
+        if holidays is None:
+            return False
+        self.io.submit_write(self.db_ops.save_holidays, holidays).result()
+        return True
+
+    def _reload_today(self, error: Optional[BaseException] = None):
+        # Something went wrong writing; show what the database actually has
+        if error is not None:
+            print(f"couldn't save attendance: {error!r}")
+        self.io.on_result(self.io.submit_read(self.db_ops.get_schedule_and_extra_classes_for_today),
+                          self.page, self._show_today_items)
+
+    def _show_today_items(self, items: List[Tuple[AttendanceRecordHybrid, AttendanceCounts]]):
+        self._set_today_items(items)
         self._refresh_ui()
 
+    def _load_today_items(self):
+        self._set_today_items(self.db_ops.get_schedule_and_extra_classes_for_today())
+
+    def _set_today_items(self, items: Iterable[Tuple[AttendanceRecordHybrid, Optional[AttendanceCounts]]]):
+        # Counts can be None while they are still loading
+        self.today_items = OrderedDict()
+        self.course_counts = {}
+        self.course_cards = {}
+        for item, counts in items:
+            key = self._card_key(item)
+            self.today_items[key] = item
+            if counts is not None:
+                self.course_counts[item.course_id] = counts
+            self.course_cards.setdefault(item.course_id, []).append(key)
+
     def _get_updated_counts(self, item: AttendanceRecordHybrid) -> AttendanceCounts:
         return self.db_ops._get_course_attendance_percentage(item.course_id)
 
@@ -564,16 +990,17 @@ class AttendanceTrackerApp:
                             end_time=time(10, 0)
                         ))
 
-                    self.db_ops.create_course(name, attendance, schedule)
-
-                    # Refresh today's items
-                    self.today_items = self.db_ops.get_schedule_and_extra_classes_for_today()
                     self.page.dialog.open = False
-                    # Refresh the UI
-                    self._refresh_ui()
+                    self.page.update()
 
-                    # Show success message
-                    self.page.show_snack_bar(ft.SnackBar(content=ft.Text(f"Course '{name}' created successfully!")))
+                    def created(items):
+                        # Refresh today's items and the UI
+                        self._show_today_items(items)
+                        # Show success message
+                        self.page.show_snack_bar(ft.SnackBar(content=ft.Text(f"Course '{name}' created successfully!")))
+
+                    self.io.on_result(self.io.submit_write(self._create_course, name, attendance, schedule),
+                                      self.page, created)
 
             except ValueError:
                 self.page.show_snack_bar(ft.SnackBar(content=ft.Text("Please enter valid values")))
@@ -596,12 +1023,22 @@ class AttendanceTrackerApp:
         self.page.dialog.open = True
         self.page.update()
 
+    def _create_course(self, name: str, attendance: float, schedule: List[ClassDetail]):
+        # Runs on the writer thread; returns the new Today list
+        self.db_ops.create_course(name, attendance, schedule)
+        return self.db_ops.get_schedule_and_extra_classes_for_today()
+
+    def close(self):
+        self.io.close()
+        self.db_ops.close()
+
     def _add_sample_data(self):
         # Add a sample course if none exists
-        conn = sqlite3.connect(self.db_ops.db_path)
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM courses")
-        if cursor.fetchone()[0] == 0:
+        with self.db_ops.db.reader() as conn:
+            course_count = conn.execute("SELECT COUNT(*) FROM courses").fetchone()[0]
+            # A v1 database brings its own courses; the background import may not have committed them yet
+            from_v1 = conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'subjects'").fetchone()
+        if course_count == 0 and not from_v1:
             # Add sample course
             schedule = [
                 ClassDetail(0, time(9, 0), time(10, 0)),  # Monday
@@ -609,12 +1046,12 @@ class AttendanceTrackerApp:
                 ClassDetail(2, time(11, 0), time(12, 0)),  # Wednesday
             ]
             self.db_ops.create_course("Sample Course", 75.0, schedule)
-        conn.close()
 
 
 def main():
-    app = AttendanceTrackerApp()
-    ft.app(target=app.main)
+    startup = StartupTimer()
+    app = AttendanceTrackerApp(startup=startup)
+    ft.app(target=app.main_async)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,132 @@
+"""Semester projections for every course at once, with NumPy.
+
+Given what has been held and attended so far, the required percentage and how
+many classes are left, `project` answers the usual questions for all courses
+in one vectorized pass:
+
+- current percentage
+- how many of the next classes can be skipped while staying at the requirement
+- how many classes in a row have to be attended to get back to it
+- the percentage after each remaining class, at a given attendance rate
+
+Counts of remaining classes come from the weekly timetable and the holiday
+calendar through calendar_math, so "what if" schedules are just a different
+weekday matrix. NumPy is optional for the apps; import this module inside a
+try/except ImportError.
+"""
+
+import datetime
+from dataclasses import dataclass
+from typing import Hashable, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+import calendar_math
+
+
+@dataclass
+class SemesterProjection:
+    keys: List[Hashable]
+    held: np.ndarray
+    attended: np.ndarray
+    required_percent: np.ndarray
+    remaining: np.ndarray
+    current_percent: np.ndarray
+    # inf when the requirement is 0%, i.e. every class can be skipped
+    max_skippable: np.ndarray
+    # inf when the requirement is 100% and a class has already been missed
+    required_streak: np.ndarray
+    # (courses, max remaining + 1): percentage after j more classes, NaN past a course's last class
+    projected: np.ndarray
+    final_percent: np.ndarray
+
+    def row(self, key: Hashable) -> int:
+        return self.keys.index(key)
+
+
+def weekday_matrix(schedule: Mapping[Hashable, Iterable]) -> Tuple[List[Hashable], np.ndarray]:
+    """(keys, matrix) where matrix[i, d] is the number of classes course i has
+    on weekday d (Monday=0). Weekdays are ints or names, as in calendar_math."""
+    keys = list(schedule)
+    matrix = np.zeros((len(keys), 7), dtype=np.int64)
+    for row, key in enumerate(keys):
+        for day in schedule[key]:
+            matrix[row, calendar_math.weekday_index(day)] += 1
+    return keys, matrix
+
+
+def remaining_classes(matrix: np.ndarray, start_date: datetime.date, end_date: datetime.date,
+                      holidays: Sequence[int] = ()) -> np.ndarray:
+    # Classes per course from start_date to end_date inclusive, skipping holidays
+    counts = np.array(calendar_math.weekday_counts(start_date, end_date, holidays), dtype=np.int64)
+    return matrix @ counts
+
+
+def project(held, attended, required_percent, remaining, attend_rate: float = 1.0,
+            keys: Sequence[Hashable] = ()) -> SemesterProjection:
+    held = np.asarray(held, dtype=np.float64)
+    attended = np.asarray(attended, dtype=np.float64)
+    required_percent = np.broadcast_to(np.asarray(required_percent, dtype=np.float64), held.shape)
+    remaining = np.broadcast_to(np.asarray(remaining, dtype=np.int64), held.shape)
+    required = required_percent / 100.0
+    # Tolerance for ratios like 3 / 0.75 that should land exactly on a whole class
+    eps = 1e-9
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        current = np.where(held > 0, attended / held * 100.0, 100.0)
+
+        # Largest k with attended / (held + k) >= required
+        skippable = np.floor(attended / required - held + eps)
+        skippable = np.where(required > 0, np.maximum(skippable, 0.0), np.inf)
+
+        # Smallest n with (attended + n) / (held + n) >= required
+        streak = np.ceil((required * held - attended) / (1.0 - required) - eps)
+        streak = np.where(current + eps >= required_percent, 0.0,
+                          np.where(required < 1.0, np.maximum(streak, 0.0), np.inf))
+
+        steps = np.arange(int(remaining.max(initial=0)) + 1, dtype=np.float64)
+        total = held[:, None] + steps
+        projected = np.where(total > 0, (attended[:, None] + attend_rate * steps) / total * 100.0, 100.0)
+    projected[steps[None, :] > remaining[:, None]] = np.nan
+    final = projected[np.arange(len(held)), remaining] if len(held) else np.zeros(0)
+
+    return SemesterProjection(
+        keys=list(keys) or list(range(len(held))),
+        held=held,
+        attended=attended,
+        required_percent=np.array(required_percent),
+        remaining=np.array(remaining),
+        current_percent=current,
+        max_skippable=skippable,
+        required_streak=streak,
+        projected=projected,
+        final_percent=final,
+    )
+
+
+def project_dbops(db_ops, semester_end: datetime.date, today: Optional[datetime.date] = None,
+                  attend_rate: float = 1.0) -> SemesterProjection:
+    """Projection for every DBOps course, keyed by course id. Held classes are the
+    ones marked present or absent, as in get_attendance_counts_bulk."""
+    today = today or datetime.date.today()
+    with db_ops.db.reader() as conn:
+        courses = conn.execute('''
+            SELECT c.id, COALESCE(s.presents, 0), COALESCE(s.absents, 0), c.required_attendance_percentage
+            FROM courses c
+            LEFT JOIN course_stats s ON c.id = s.course_id
+            ORDER BY c.id
+        ''').fetchall()
+        slots = conn.execute("SELECT course_id, weekday FROM schedule WHERE included_in_schedule = 1").fetchall()
+
+    schedule = {course_id: [] for course_id, _, _, _ in courses}
+    for course_id, weekday in slots:
+        if course_id in schedule:
+            schedule[course_id].append(weekday)
+    keys, matrix = weekday_matrix(schedule)
+    remaining = remaining_classes(matrix, today + datetime.timedelta(days=1), semester_end,
+                                  db_ops.holidays.ordinals)
+
+    presents = np.array([row[1] for row in courses], dtype=np.float64)
+    absents = np.array([row[2] for row in courses], dtype=np.float64)
+    required = np.array([row[3] for row in courses], dtype=np.float64)
+    return project(presents + absents, presents, required, remaining, attend_rate, keys)
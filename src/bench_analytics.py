@@ -0,0 +1,63 @@
+"""Times analytics.project for hundreds of courses against the same answers
+computed one course at a time in plain Python.
+
+    python bench_analytics.py [courses]
+"""
+
+import datetime
+import math
+import random
+import sys
+import time as clock
+
+import analytics
+
+
+def per_course(held, attended, required, remaining):
+    # The straightforward loop the chart screen would otherwise run
+    results = []
+    for h, a, r, left in zip(held, attended, required, remaining):
+        r /= 100.0
+        skippable = 0
+        while r > 0 and a / (h + skippable + 1) >= r:
+            skippable += 1
+        streak = 0
+        while r < 1 and (h + streak == 0 or (a + streak) / (h + streak) < r):
+            streak += 1
+        curve = [(a + j) / (h + j) * 100 if h + j else 100.0 for j in range(left + 1)]
+        results.append((skippable, streak, curve))
+    return results
+
+
+def timed(label: str, fn, repeat: int = 20):
+    start = clock.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    print(f"{label:<24} {(clock.perf_counter() - start) / repeat * 1000:8.2f} ms")
+    return result
+
+
+def main():
+    courses = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rng = random.Random(3)
+    schedule = {n: rng.sample(range(6), rng.randint(1, 4)) for n in range(courses)}
+    held = [rng.randint(10, 120) for _ in range(courses)]
+    attended = [rng.randint(h // 2, h) for h in held]
+    required = [rng.choice([60, 75, 80, 85]) for _ in range(courses)]
+
+    today = datetime.date(2025, 9, 15)
+    keys, matrix = analytics.weekday_matrix(schedule)
+    remaining = analytics.remaining_classes(matrix, today, datetime.date(2025, 12, 12))
+    print(f"{courses} courses, up to {remaining.max()} classes left")
+
+    projection = timed("vectorized", lambda: analytics.project(held, attended, required, remaining, keys=keys))
+    loop = timed("per-course loop", lambda: per_course(held, attended, required, remaining.tolist()), repeat=3)
+
+    for row, (skippable, streak, curve) in enumerate(loop):
+        assert projection.max_skippable[row] == skippable, row
+        assert projection.required_streak[row] == streak, row
+        assert math.isclose(projection.final_percent[row], curve[-1]), row
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""Micro-benchmark: per-call latency of a DBOps read with a fresh sqlite3.connect
+per call (the old behaviour) versus the long-lived ConnectionManager.
+
+    python bench_connections.py [calls]
+"""
+
+import os
+import sqlite3
+import sys
+import tempfile
+import time as clock
+from datetime import time
+
+from AI import ClassDetail, DBOps
+
+AGGREGATE_SQL = '''
+    SELECT
+        SUM(CASE WHEN class_status = 'Present' THEN 1 ELSE 0 END),
+        SUM(CASE WHEN class_status = 'Absent' THEN 1 ELSE 0 END),
+        required_attendance_percentage
+    FROM courses c
+    LEFT JOIN attendance a ON c.id = a.course_id
+    WHERE c.id = ?
+    GROUP BY c.id
+'''
+
+
+def connect_per_call(db_path: str, course_id: int):
+    conn = sqlite3.connect(db_path)
+    row = conn.execute(AGGREGATE_SQL, (course_id,)).fetchone()
+    conn.close()
+    return row
+
+
+def pooled(db_ops: DBOps, course_id: int):
+    with db_ops.db.reader() as conn:
+        return conn.execute(AGGREGATE_SQL, (course_id,)).fetchone()
+
+
+def timed(label: str, calls: int, fn):
+    start = clock.perf_counter()
+    for i in range(calls):
+        fn(i % 5 + 1)
+    elapsed = clock.perf_counter() - start
+    print(f"{label:<20} {elapsed / calls * 1e6:8.1f} us/call")
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    with tempfile.TemporaryDirectory() as tmp:
+        db_ops = DBOps(os.path.join(tmp, "bench.db"))
+        for n in range(5):
+            db_ops.create_course(f"Course {n}", 75.0, [ClassDetail(d, time(9, 0), time(10, 0)) for d in range(5)])
+
+        timed("connect per call", calls, lambda course_id: connect_per_call(db_ops.db_path, course_id))
+        timed("connection manager", calls, lambda course_id: pooled(db_ops, course_id))
+        db_ops.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""Time to first frame of the Today tab: the sync main, which loads everything
+before building the page, versus main_async, which sends a skeleton first and
+streams the cards and their percentages in afterwards.
+
+Uses bench_handlers' simulated slow disk and bench_today_patch's recording
+connection. Times are from the call to main, as reported by StartupTimer.
+
+    python bench_first_frame.py [courses] [commit_ms] [read_ms]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+from datetime import time
+
+import flet as ft
+
+from AI import AttendanceTrackerApp, ClassDetail
+from bench_handlers import SlowDiskConnectionManager
+from bench_today_patch import RecordingConnection
+from startup_timer import StartupTimer
+
+
+def run(db_path: str, use_async: bool, loop):
+    app = AttendanceTrackerApp(db_path)
+    app.db_ops.db.__class__ = SlowDiskConnectionManager
+    app.startup = StartupTimer()
+    page = ft.Page(RecordingConnection(), "bench", loop)
+    if use_async:
+        asyncio.run_coroutine_threadsafe(app.main_async(page), loop).result()
+    else:
+        app.main(page)
+        app.startup.mark("attendance")
+    app.close()
+    return app.startup
+
+
+def main():
+    courses = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    SlowDiskConnectionManager.commit_delay = (float(sys.argv[2]) if len(sys.argv) > 2 else 20.0) / 1000
+    SlowDiskConnectionManager.read_delay = (float(sys.argv[3]) if len(sys.argv) > 3 else 10.0) / 1000
+
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        setup = AttendanceTrackerApp(db_path)
+        for n in range(courses):
+            setup.db_ops.create_course(f"Course {n}", 75.0,
+                                       [ClassDetail(d, time(8 + n % 12, 0), time(9 + n % 12, 0)) for d in range(7)])
+        setup.close()
+
+        print(f"{courses} courses, {SlowDiskConnectionManager.commit_delay * 1000:g} ms per commit, "
+              f"{SlowDiskConnectionManager.read_delay * 1000:g} ms per read")
+        for label, use_async in (("sync main", False), ("main_async", True)):
+            startup = run(db_path, use_async, loop)
+            print(f"{label:<12} first frame {startup.elapsed('first frame'):7.1f} ms   "
+                  f"fully loaded {startup.elapsed('attendance'):7.1f} ms")
+    loop.call_soon_threadsafe(loop.stop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Time to first paint of v1's text on a cold start, with Inter from the old
+rsms.me URLs, from the bundled assets (fonts.py), or with the system font.
+
+Flutter holds back text in a registered family until that font has loaded, and
+loads the families side by side, so text paints once the first frame has been
+sent and the slowest font is in. The first frame is timed by building the
+tracker against bench_today_patch's recording connection, in a fresh database;
+the Flet client itself isn't started. Run it offline (or with a firewalled
+network) to see the stall the remote fonts caused.
+
+    python bench_fonts.py [timeout_s]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time as clock
+import urllib.request
+
+import flet as ft
+
+from bench_today_patch import RecordingConnection
+from fonts import ASSETS_DIR, FONT_FILES
+
+# Where v1 loaded Inter from before it was bundled
+REMOTE_FONTS = {
+    "Inter": "https://rsms.me/inter/font-files/Inter-Regular.woff2",
+    "Inter Bold": "https://rsms.me/inter/font-files/Inter-Bold.woff2",
+}
+
+
+def fetch_remote(url: str, timeout: float):
+    start = clock.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            size = len(response.read())
+        result = f"{size / 1024:.0f} KB"
+    except OSError as error:
+        result = f"failed ({getattr(error, 'reason', error)})"
+    return (clock.perf_counter() - start) * 1000, result
+
+
+def read_bundled(file: str):
+    start = clock.perf_counter()
+    path = ASSETS_DIR / file
+    if not path.is_file():
+        return (clock.perf_counter() - start) * 1000, "missing, system font"
+    size = len(path.read_bytes())
+    return (clock.perf_counter() - start) * 1000, f"{size / 1024:.0f} KB"
+
+
+def first_frame_ms() -> float:
+    import v1
+
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        # v1 opens attendance.db in the working directory
+        os.chdir(tmp)
+        try:
+            start = clock.perf_counter()
+            tracker = v1.tracker(ft.Page(RecordingConnection(), "bench", loop))
+            elapsed = (clock.perf_counter() - start) * 1000
+            tracker.on_close(None)
+        finally:
+            os.chdir(cwd)
+    loop.call_soon_threadsafe(loop.stop)
+    return elapsed
+
+
+def main():
+    timeout = float(sys.argv[1]) if len(sys.argv) > 1 else 10.0
+    frame_ms = first_frame_ms()
+    remote_wait = bundled_wait = 0.0
+    for family, file in FONT_FILES.items():
+        remote_ms, remote = fetch_remote(REMOTE_FONTS[family], timeout)
+        bundled_ms, bundled = read_bundled(file)
+        remote_wait = max(remote_wait, remote_ms)
+        bundled_wait = max(bundled_wait, bundled_ms)
+        print(f"{family:<12} rsms.me {remote_ms:9.1f} ms  {remote:<40} bundled {bundled_ms:7.2f} ms  {bundled}")
+
+    print(f"first frame {frame_ms:.1f} ms; text painted after")
+    for label, wait_ms in (("rsms.me", remote_wait), ("bundled", bundled_wait), ("system font", 0.0)):
+        print(f"  {label:<12} {frame_ms + wait_ms:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Handler latency on a slow disk: how long a Today swipe keeps its handler busy
+when the attendance write runs inline (the old behaviour) versus when it is
+handed to the DB executor, plus how long the executor takes to land the counts.
+
+The slow disk is simulated by sleeping before every commit and every read; the
+page is driven through bench_today_patch's recording connection, with its event
+loop running on a background thread as it would under Flet. Swipes are paced
+`interval_ms` apart, roughly how fast someone can swipe through the list.
+
+    python bench_handlers.py [swipes] [commit_ms] [read_ms] [interval_ms]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time as clock
+from contextlib import contextmanager
+from datetime import time
+
+import flet as ft
+
+from AI import AttendanceTrackerApp, ClassDetail, CourseClassStatus
+from bench_today_patch import RecordingConnection
+from db_connection import ConnectionManager
+
+# Upper bounds of the histogram buckets, in ms
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class SlowDiskConnectionManager(ConnectionManager):
+    commit_delay = 0.0
+    read_delay = 0.0
+
+    @contextmanager
+    def transaction(self, immediate: bool = False):
+        outermost = not self.connection.in_transaction
+        with super().transaction(immediate) as conn:
+            yield conn
+            if outermost:
+                # fsync of the WAL
+                clock.sleep(self.commit_delay)
+
+    @contextmanager
+    def reader(self):
+        with super().reader() as conn:
+            clock.sleep(self.read_delay)
+            yield conn
+
+
+def histogram(label: str, samples_ms):
+    samples_ms = sorted(samples_ms)
+    count = len(samples_ms)
+    p50 = samples_ms[count // 2]
+    p99 = samples_ms[min(count - 1, int(count * 0.99))]
+    print(f"{label}: n={count} p50={p50:.2f} ms p99={p99:.2f} ms max={samples_ms[-1]:.2f} ms")
+    lower = 0
+    for upper in BUCKETS + (float("inf"),):
+        n = sum(1 for s in samples_ms if lower <= s < upper)
+        name = f"<{upper:g} ms" if upper != float("inf") else f">={lower:g} ms"
+        print(f"  {name:>10} {n:6d} {'#' * round(n / count * 50)}")
+        lower = upper
+
+
+def swipes(app, count):
+    # Alternate Present/Absent over the Today cards so every swipe is a real write
+    items = list(app.today_items.values())
+    for n in range(count):
+        yield items[n % len(items)], CourseClassStatus.PRESENT if n % 2 else CourseClassStatus.ABSENT
+
+
+def inline_mark(app, item, status):
+    # What _mark_attendance did before the executor: write, then patch, on the handler thread
+    counts = app._write_attendance(item, status)
+    item.class_status = status
+    app.today_items.move_to_end(app._card_key(item))
+    app.course_counts[item.course_id] = counts
+    app._patch_card(item, counts)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    SlowDiskConnectionManager.commit_delay = (float(sys.argv[2]) if len(sys.argv) > 2 else 20.0) / 1000
+    SlowDiskConnectionManager.read_delay = (float(sys.argv[3]) if len(sys.argv) > 3 else 2.0) / 1000
+    interval = (float(sys.argv[4]) if len(sys.argv) > 4 else 50.0) / 1000
+
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = AttendanceTrackerApp(os.path.join(tmp, "bench.db"))
+        for n in range(8):
+            app.db_ops.create_course(f"Course {n}", 75.0, [ClassDetail(d, time(8 + n, 0), time(9 + n, 0)) for d in range(7)])
+        app.main(ft.Page(RecordingConnection(), "bench", loop))
+        app.db_ops.db.__class__ = SlowDiskConnectionManager
+
+        print(f"{count} swipes, {SlowDiskConnectionManager.commit_delay * 1000:g} ms per commit, "
+              f"{SlowDiskConnectionManager.read_delay * 1000:g} ms per read, one swipe every {interval * 1000:g} ms\n")
+
+        inline = []
+        for item, status in swipes(app, count):
+            start = clock.perf_counter()
+            inline_mark(app, item, status)
+            inline.append((clock.perf_counter() - start) * 1000)
+            clock.sleep(max(0.0, interval - (clock.perf_counter() - start)))
+        histogram("inline handler", inline)
+
+        handler, submitted, landed = [], [], []
+        done = threading.Semaphore(0)
+        write_attendance, apply_counts = app._write_attendance, app._apply_counts
+
+        def timed_write(item, status):
+            # The writer runs one write at a time, in submission order
+            counts = write_attendance(item, status)
+            landed.append((clock.perf_counter() - submitted[len(landed)]) * 1000)
+            return counts
+
+        def counted_apply(item, counts):
+            apply_counts(item, counts)
+            done.release()
+
+        app._write_attendance, app._apply_counts = timed_write, counted_apply
+        for item, status in swipes(app, count):
+            start = clock.perf_counter()
+            submitted.append(start)
+            app._mark_attendance(item, status)
+            handler.append((clock.perf_counter() - start) * 1000)
+            clock.sleep(max(0.0, interval - (clock.perf_counter() - start)))
+        for _ in range(count):
+            done.acquire()
+        print()
+        histogram("executor handler", handler)
+        print()
+        histogram("executor write landed", landed)
+
+        app.close()
+    loop.call_soon_threadsafe(loop.stop)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Memory used by N attendance records held three ways: the old dict-backed
+record classes, the slotted ScheduledClass, and the columnar AttendanceHistory.
+
+    python bench_memory.py [rows]
+"""
+
+import gc
+import sys
+import time as clock
+import tracemalloc
+from dataclasses import dataclass
+from datetime import date, time, timedelta
+from typing import Optional
+
+from AI import CourseClassStatus, ScheduledClass
+from history import AttendanceHistory
+
+STATUSES = list(CourseClassStatus)
+
+
+# The record classes as they were before __slots__, for comparison
+@dataclass
+class DictRecord:
+    course_name: str
+    course_id: int
+    start_time: time
+    end_time: time
+    class_status: CourseClassStatus
+    date: date
+
+
+class DictScheduledClass(DictRecord):
+    def __init__(self, attendance_id: Optional[int], schedule_id: Optional[int],
+                 course_id: int, course_name: str, start_time: time, end_time: time,
+                 class_status: CourseClassStatus, record_date: date):
+        super().__init__(course_name, course_id, start_time, end_time, class_status, record_date)
+        self.attendance_id = attendance_id
+        self.schedule_id = schedule_id
+
+
+def rows(count: int):
+    # What a history query returns: one row per class on consecutive dates
+    start = date(2020, 1, 1)
+    for n in range(count):
+        yield n + 1, n % 12 + 1, n % 36 + 1, None, start + timedelta(days=n // 20), STATUSES[n % 3]
+
+
+def as_objects(cls, count: int):
+    names = [f"Course {n}" for n in range(1, 13)]
+    return [cls(attendance_id, schedule_id, course_id, names[course_id - 1],
+                time(9 + course_id % 8, 0), time(10 + course_id % 8, 0), status, record_date)
+            for attendance_id, course_id, schedule_id, _, record_date, status in rows(count)]
+
+
+def measure(label: str, build, count: int):
+    gc.collect()
+    tracemalloc.start()
+    started = clock.perf_counter()
+    held = build(count)
+    elapsed = clock.perf_counter() - started
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<26} {size / 1e6:8.1f} MB {size / count:7.1f} B/row {elapsed * 1000:8.1f} ms")
+    del held
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    print(f"{count} rows")
+    measure("dict-backed records", lambda n: as_objects(DictScheduledClass, n), count)
+    measure("slotted records", lambda n: as_objects(ScheduledClass, n), count)
+    measure("columnar history", lambda n: AttendanceHistory.from_rows(rows(n)), count)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Builds large synthetic v1 databases, opens them with DBOps and checks the
+v1 import: that it survives being interrupted, that every event ends up in
+attendance exactly once, and how long the UI thread waits for the database
+while the import runs in the background.
+
+    python bench_migration.py [years] [subjects]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time as clock
+from datetime import date, timedelta
+
+import v1_schema
+from AI import DBOps
+from migrations import MIGRATIONS
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def build_v1(db_path: str, years: int, subjects: int, flat: bool = False) -> int:
+    # Every slot is marked on every date it meets, like a diligent user would
+    rng = random.Random(11)
+    timetable = []
+    for n in range(subjects):
+        for day in rng.sample(WEEKDAYS[:6], 3):
+            timetable.append((f"Subject {n}", day, f"{8 + n % 10:02d}:30"))
+
+    conn = sqlite3.connect(db_path)
+    with conn:
+        if flat:
+            # The layout from before subjects/slots existed
+            conn.execute("""CREATE TABLE attendance (subject text, req_attendance INTEGER, day text, timing INTEGER,
+                            classes_held INTEGER, classes_attended INTEGER)""")
+            conn.executemany("INSERT INTO attendance VALUES (?, 75, ?, ?, 0, 0)", timetable)
+            conn.execute("""CREATE TABLE attendance_events (subject text, timing text, date text, status text,
+                            PRIMARY KEY (subject, timing, date))""")
+        else:
+            v1_schema.ensure_schema(conn)
+            for subject, day, timing in timetable:
+                conn.execute("INSERT OR IGNORE INTO subjects (name, req_attendance) VALUES (?, 75)", (subject,))
+                conn.execute("INSERT INTO slots (subject_id, day, timing) SELECT id, ?, ? FROM subjects WHERE name = ?",
+                             (day, timing, subject))
+
+        events = []
+        day = date.today() - timedelta(days=365 * years)
+        while day <= date.today():
+            for subject, weekday, timing in timetable:
+                if weekday == WEEKDAYS[day.weekday()]:
+                    events.append((subject, timing, day.isoformat(), rng.choice(["present", "present", "absent"])))
+            day += timedelta(days=1)
+        conn.executemany("INSERT INTO attendance_events VALUES (?, ?, ?, ?)", events)
+    conn.close()
+    return len(events)
+
+
+def expected_presents(db_path: str):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("""SELECT subject, COUNT(*) FROM attendance_events
+                           WHERE status = 'present' GROUP BY subject""").fetchall()
+    conn.close()
+    return dict(rows)
+
+
+def ui_latency(db_ops: DBOps, seconds: float):
+    # What the Today tab sees: one counts read, over and over, while the import writes
+    waits = []
+    deadline = clock.perf_counter() + seconds
+    while clock.perf_counter() < deadline:
+        started = clock.perf_counter()
+        db_ops.get_attendance_counts_bulk([1, 2, 3])
+        waits.append(clock.perf_counter() - started)
+        clock.sleep(0.005)
+    waits.sort()
+    return waits[len(waits) // 2] * 1000, waits[int(len(waits) * 0.99)] * 1000, waits[-1] * 1000
+
+
+def check(db_path: str, events: int, presents):
+    db_ops = DBOps(db_path)
+    db_ops.migrator.join()
+    with db_ops.db.reader() as conn:
+        rows = conn.execute("SELECT COUNT(*) FROM attendance").fetchone()[0]
+        stats = dict(conn.execute("""SELECT c.name, s.presents FROM courses c
+                                     JOIN course_stats s ON s.course_id = c.id""").fetchall())
+        unmatched = conn.execute("SELECT COUNT(*) FROM attendance WHERE schedule_id IS NULL").fetchone()[0]
+    drifted = db_ops.rebuild_stats()
+    version = db_ops.migrator.version
+    db_ops.close()
+
+    assert version == MIGRATIONS[-1][0], version
+    assert rows == events, (rows, events)
+    assert stats == presents, "presents per course differ from v1"
+    assert not drifted and not unmatched
+    print(f"  ok: {rows} attendance rows, {len(stats)} courses, version {version}")
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    subjects = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    with tempfile.TemporaryDirectory() as tmp:
+        for flat in (False, True):
+            db_path = os.path.join(tmp, f"v1-{'flat' if flat else 'slots'}.db")
+            events = build_v1(db_path, years, subjects, flat)
+            presents = expected_presents(db_path)
+            print(f"{'flat' if flat else 'subjects/slots'} v1 database: {years} years, {subjects} subjects, {events} events")
+
+            # Start the import, interrupt it part way and reopen
+            started = clock.perf_counter()
+            db_ops = DBOps(db_path)
+            median, p99, worst = ui_latency(db_ops, 0.3)
+            db_ops.close()
+            conn = sqlite3.connect(db_path)
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            position = conn.execute("SELECT position FROM migration_progress WHERE name = 'v1_events'").fetchone() \
+                if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'migration_progress'").fetchone() else None
+            conn.close()
+            print(f"  interrupted at version {version}, event rowid {position[0] if position else 0}")
+            print(f"  UI read while importing: median {median:.2f} ms, p99 {p99:.2f} ms, max {worst:.2f} ms")
+
+            check(db_path, events, presents)
+            print(f"  total {clock.perf_counter() - started:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
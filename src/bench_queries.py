@@ -0,0 +1,142 @@
+"""Generates a multi-year synthetic database and times the queries each screen
+runs, with and without the indexes created by DBOps.init_database and the v1
+tracker. Counts are timed with the COUNT over attendance they used to be, since
+course_stats reads them by primary key either way.
+
+    python bench_queries.py [years] [courses]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time as clock
+from datetime import date, time, timedelta
+
+import v1_schema
+from AI import ClassDetail, CourseClassStatus, DBOps
+
+STATUSES = [CourseClassStatus.PRESENT.value, CourseClassStatus.ABSENT.value, CourseClassStatus.CANCELLED.value]
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Per-course counts as DBOps computed them before course_stats
+COUNTS_SQL = """SELECT c.id, a.presents, a.absents, a.cancels, a.unsets, c.required_attendance_percentage
+                FROM courses c
+                LEFT JOIN (
+                    SELECT course_id,
+                           SUM(CASE WHEN class_status = 'Present' THEN 1 ELSE 0 END) AS presents,
+                           SUM(CASE WHEN class_status = 'Absent' THEN 1 ELSE 0 END) AS absents,
+                           SUM(CASE WHEN class_status = 'Cancelled' THEN 1 ELSE 0 END) AS cancels,
+                           SUM(CASE WHEN class_status = 'Unset' THEN 1 ELSE 0 END) AS unsets
+                    FROM (
+                        SELECT schedule_id, class_status, course_id FROM attendance
+                        WHERE course_id IN ({placeholders}) AND schedule_id IS NOT NULL
+                        UNION ALL
+                        SELECT extra_class_id, class_status, course_id FROM attendance
+                        WHERE course_id IN ({placeholders}) AND extra_class_id IS NOT NULL
+                    )
+                    GROUP BY course_id
+                ) a ON c.id = a.course_id
+                WHERE c.id IN ({placeholders})"""
+
+
+def build_dbops(db_path: str, years: int, courses: int) -> DBOps:
+    db_ops = DBOps(db_path)
+    rng = random.Random(42)
+    for n in range(courses):
+        days = rng.sample(range(7), 3)
+        db_ops.create_course(f"Course {n}", 75.0, [ClassDetail(d, time(9 + n % 8, 0), time(10 + n % 8, 0)) for d in days])
+
+    start = date.today() - timedelta(days=365 * years)
+    with db_ops.db.transaction() as conn:
+        slots = conn.execute("SELECT id, course_id, weekday FROM schedule").fetchall()
+        rows = []
+        extras = []
+        day = start
+        while day <= date.today():
+            for schedule_id, course_id, weekday in slots:
+                if weekday == day.weekday():
+                    rows.append((schedule_id, day.isoformat(), rng.choice(STATUSES), course_id))
+            if rng.random() < 0.1:
+                extras.append((rng.randint(1, courses), day.isoformat(), "14:00", "15:00", rng.choice(STATUSES)))
+            day += timedelta(days=1)
+        conn.executemany("INSERT INTO attendance (schedule_id, date, class_status, course_id) VALUES (?, ?, ?, ?)", rows)
+        conn.executemany("INSERT INTO extra_classes (course_id, date, start_time, end_time, class_status) VALUES (?, ?, ?, ?, ?)", extras)
+    return db_ops
+
+
+def build_v1(db_path: str, years: int, courses: int):
+    # v1 only stores one row per weekly slot, so pad it with archived semesters
+    # to get a timetable comparable to a multi-year install
+    conn = sqlite3.connect(db_path)
+    with conn:
+        v1_schema.ensure_schema(conn)
+        rng = random.Random(7)
+        for semester in range(years * 40):
+            for n in range(courses):
+                subject_id = conn.execute("INSERT INTO subjects (name, req_attendance) VALUES (?, 75)",
+                                          (f"Course {semester}-{n}",)).lastrowid
+                conn.executemany("INSERT INTO slots (subject_id, day, timing) VALUES (?, ?, '09:00')",
+                                 [(subject_id, day) for day in rng.sample(WEEKDAYS[:6], 3)])
+    return conn
+
+
+def timed(label: str, fn, repeat: int = 50):
+    start = clock.perf_counter()
+    for _ in range(repeat):
+        fn()
+    print(f"  {label:<32} {(clock.perf_counter() - start) / repeat * 1000:8.3f} ms")
+
+
+def drop_indexes(conn: sqlite3.Connection):
+    # Every index that was created explicitly; the ones behind UNIQUE and PRIMARY KEY stay
+    names = [name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql IS NOT NULL")]
+    for name in names:
+        conn.execute(f"DROP INDEX {name}")
+
+
+def run_dbops(db_ops: DBOps, courses: int):
+    course_ids = list(range(1, courses + 1))
+    counts_sql = COUNTS_SQL.format(placeholders=", ".join("?" * courses))
+    today = date.today()
+    timed("today view (classes)", db_ops.get_classes_for_today)
+    timed("classes in the last 30 days", lambda: db_ops.get_classes_for_range(today - timedelta(days=30), today))
+    timed("one course's last 90 days", lambda: list(db_ops.iter_attendance(1, today - timedelta(days=90), today)))
+    with db_ops.db.reader() as conn:
+        timed("counts for all courses", lambda: conn.execute(counts_sql, course_ids * 3).fetchall())
+        day = (today - timedelta(days=30)).isoformat()
+        timed("extra classes on a date", lambda: conn.execute(
+            "SELECT * FROM extra_classes WHERE date = ?", (day,)).fetchall())
+
+
+def run_v1(conn: sqlite3.Connection):
+    timed("home screen (day = ?)", lambda: conn.execute(
+        v1_schema.SLOT_ROWS_SQL + " WHERE sl.day = ? ORDER BY sl.timing", ("Monday",)).fetchall())
+    timed("counters (subjects)", lambda: conn.execute(v1_schema.COUNTERS_SQL).fetchall())
+
+
+def main():
+    years = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    courses = int(sys.argv[2]) if len(sys.argv) > 2 else 12
+    with tempfile.TemporaryDirectory() as tmp:
+        db_ops = build_dbops(os.path.join(tmp, "dbops.db"), years, courses)
+        v1_conn = build_v1(os.path.join(tmp, "v1.db"), years, courses)
+        with db_ops.db.reader() as conn:
+            rows = conn.execute("SELECT COUNT(*) FROM attendance").fetchone()[0]
+        print(f"{years} years, {courses} courses, {rows} attendance rows")
+
+        for label in ("with indexes", "without indexes"):
+            print(label)
+            run_dbops(db_ops, courses)
+            run_v1(v1_conn)
+            drop_indexes(db_ops.db.connection)
+            with v1_conn:
+                drop_indexes(v1_conn)
+
+        v1_conn.close()
+        db_ops.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Startup benchmark: runs `python -X importtime` on the app modules in a fresh
+interpreter and reports where the import time goes. Exits non-zero if a heavy
+optional dependency is imported at startup or the total exceeds the budget,
+so import-time regressions get caught.
+
+    python bench_startup.py [module] [budget_ms]
+"""
+
+import subprocess
+import sys
+
+# Only needed on first real use; they must never be imported at startup
+LAZY_MODULES = ("googleapiclient", "httplib2", "google.auth", "dotenv", "numpy", "analytics")
+
+# `import v1` measures about 550 ms, nearly all of it flet; the budget leaves
+# room for noise but not for another heavy dependency
+DEFAULT_BUDGET_MS = 750.0
+
+
+def import_times(module: str):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True,
+    )
+    times = []
+    for line in result.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        times.append((name.strip(), int(self_us), int(cumulative_us)))
+    return times
+
+
+def main():
+    module = sys.argv[1] if len(sys.argv) > 1 else "v1"
+    budget_ms = float(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_BUDGET_MS
+
+    times = import_times(module)
+    total_ms = next(cumulative for name, _, cumulative in times if name == module) / 1000
+    print(f"import {module}: {total_ms:.1f} ms")
+    print("slowest top-level imports:")
+    top_level = [entry for entry in times if "." not in entry[0]]
+    for name, _, cumulative in sorted(top_level, key=lambda entry: entry[2], reverse=True)[:10]:
+        print(f"  {name:<30} {cumulative / 1000:8.1f} ms")
+
+    failed = False
+    eager = sorted({name for name, _, _ in times if name.startswith(LAZY_MODULES)})
+    if eager:
+        print(f"FAIL: imported at startup: {', '.join(eager)}")
+        failed = True
+    if total_ms > budget_ms:
+        print(f"FAIL: {total_ms:.1f} ms is over the {budget_ms:.0f} ms budget")
+        failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
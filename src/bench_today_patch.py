@@ -0,0 +1,79 @@
+"""Measures what one swipe on the Today tab costs: bytes of update commands sent
+to the Flet client and handler latency, for the old full rebuild
+(_refresh_ui) versus patching the swiped card in place (_patch_card).
+
+The page is driven through a recording Connection, so no client is needed.
+
+    python bench_today_patch.py [courses]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time as clock
+from datetime import time
+
+import flet as ft
+from flet.core.connection import Connection
+from flet.core.protocol import CommandEncoder, PageCommandsBatchResponsePayload
+
+from AI import AttendanceTrackerApp, ClassDetail, CourseClassStatus
+
+
+class RecordingConnection(Connection):
+    def __init__(self):
+        super().__init__()
+        self.bytes_sent = 0
+        self.next_id = 0
+
+    def send_commands(self, session_id, commands):
+        self.bytes_sent += len(json.dumps(commands, cls=CommandEncoder))
+        results = []
+        for command in commands:
+            if command.name == "add":
+                # The client answers an add with the ids of the new controls
+                ids = []
+                for _ in command.commands:
+                    self.next_id += 1
+                    ids.append(f"_{self.next_id}")
+                results.append(" ".join(ids))
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+    def send_command(self, session_id, command):
+        return self.send_commands(session_id, [command])
+
+
+def measure(label, conn, fn, app):
+    items = list(app.today_items.values())
+    conn.bytes_sent = 0
+    start = clock.perf_counter()
+    for item in items:
+        item.class_status = CourseClassStatus.PRESENT
+        fn(item, app.course_counts[item.course_id])
+    elapsed = clock.perf_counter() - start
+    print(f"{label:<16} {conn.bytes_sent / len(items):10.0f} bytes/swipe {elapsed / len(items) * 1000:8.2f} ms/swipe")
+
+
+def main():
+    courses = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    with tempfile.TemporaryDirectory() as tmp:
+        app = AttendanceTrackerApp(os.path.join(tmp, "bench.db"))
+        for n in range(courses):
+            app.db_ops.create_course(f"Course {n}", 75.0, [ClassDetail(d, time(8 + n, 0), time(9 + n, 0)) for d in range(7)])
+
+        conn = RecordingConnection()
+        page = ft.Page(conn, "bench", asyncio.new_event_loop())
+        app.main(page)
+
+        measure("full rebuild", conn, lambda item, counts: app._refresh_ui(), app)
+        for item in app.today_items.values():
+            item.class_status = CourseClassStatus.UNSET
+        app._refresh_ui()
+        measure("patch card", conn, app._patch_card, app)
+        app.close()
+
+
+if __name__ == "__main__":
+    main()
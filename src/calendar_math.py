@@ -0,0 +1,63 @@
+"""Calendar arithmetic for counting how many classes were held in a date range.
+Every count is done in O(1) per weekday (full weeks plus the remainder) so we
+never have to walk the range one day at a time. Holidays are passed in as a
+sorted sequence of date ordinals and subtracted with a binary search."""
+
+import bisect
+import datetime
+from typing import Dict, Hashable, Iterable, List, Mapping, Sequence
+
+WEEKDAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+WEEKDAY_INDEX = {name.lower(): index for index, name in enumerate(WEEKDAY_NAMES)}
+
+
+def weekday_index(day) -> int:
+    # Accepts 0-6 (Monday=0) or a day name like "Monday"
+    if isinstance(day, int):
+        if not 0 <= day <= 6:
+            raise ValueError(f"weekday out of range: {day}")
+        return day
+    try:
+        return WEEKDAY_INDEX[str(day).strip().lower()]
+    except KeyError:
+        raise ValueError(f"unknown weekday: {day!r}") from None
+
+
+def weekday_counts(start_date: datetime.date, end_date: datetime.date,
+                   holidays: Sequence[int] = ()) -> List[int]:
+    """Number of times each weekday (Monday=0) occurs in [start_date, end_date],
+    not counting the dates in `holidays` (sorted ordinals)"""
+    if end_date < start_date:
+        return [0] * 7
+    full_weeks, remainder = divmod((end_date - start_date).days + 1, 7)
+    counts = [full_weeks] * 7
+    first = start_date.weekday()
+    for offset in range(remainder):
+        counts[(first + offset) % 7] += 1
+    for ordinal in holidays_in_range(holidays, start_date, end_date):
+        # date.fromordinal(1) is a Monday
+        counts[(ordinal - 1) % 7] -= 1
+    return counts
+
+
+def holidays_in_range(holidays: Sequence[int], start_date: datetime.date, end_date: datetime.date) -> Sequence[int]:
+    low = bisect.bisect_left(holidays, start_date.toordinal())
+    high = bisect.bisect_right(holidays, end_date.toordinal())
+    return holidays[low:high]
+
+
+def count_classes(start_date: datetime.date, end_date: datetime.date, weekdays: Iterable,
+                  holidays: Sequence[int] = ()) -> int:
+    """Classes held in the range for a course with a slot on each of the given
+    weekdays. A weekday listed twice (two slots that day) is counted twice."""
+    counts = weekday_counts(start_date, end_date, holidays)
+    return sum(counts[weekday_index(day)] for day in weekdays)
+
+
+def count_classes_bulk(start_date: datetime.date, end_date: datetime.date,
+                       schedule: Mapping[Hashable, Iterable],
+                       holidays: Sequence[int] = ()) -> Dict[Hashable, int]:
+    """Classes held for every course in one pass. `schedule` maps a course key to
+    the weekday of each of its slots; the per-weekday counts are only computed once."""
+    counts = weekday_counts(start_date, end_date, holidays)
+    return {key: sum(counts[weekday_index(day)] for day in days) for key, days in schedule.items()}
@@ -0,0 +1,115 @@
+import sqlite3
+import threading
+import weakref
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+
+class _ThreadReader:
+    # Held only by the thread's locals, so it goes away with the thread
+    __slots__ = ("conn", "__weakref__")
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+
+class ConnectionManager:
+    """Owns the SQLite connections for a database file.
+
+    A single long-lived connection is used for writes and, by default, for reads
+    too. Statements are cached per connection by sqlite3 (keyed by SQL text), so
+    callers should keep their SQL strings constant and pass values as parameters.
+    With `pool_readers=True` every other thread gets its own read connection, so
+    background workers can read concurrently with the main connection. It's
+    closed when its thread ends, or by close().
+    """
+
+    # Applied to every connection we open. WAL lets readers run alongside the
+    # writer; NORMAL sync is safe in WAL mode and avoids an fsync per commit.
+    PRAGMAS = (
+        "PRAGMA journal_mode = WAL",
+        "PRAGMA synchronous = NORMAL",
+        "PRAGMA cache_size = -8000",
+        "PRAGMA temp_store = MEMORY",
+    )
+
+    def __init__(self, db_path: str, cached_statements: int = 256, pool_readers: bool = False):
+        self.db_path = db_path
+        self.cached_statements = cached_statements
+        # An in-memory database is private to its connection, so it can't be pooled
+        self.pool_readers = pool_readers and db_path != ":memory:"
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._owner_thread = threading.get_ident()
+        self._readers: List[sqlite3.Connection] = []
+
+    def _open(self) -> sqlite3.Connection:
+        # Autocommit mode; transactions are started explicitly by transaction()
+        conn = sqlite3.connect(self.db_path, isolation_level=None, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            with self._lock:
+                if self._conn is None:
+                    self._conn = self._open()
+        return self._conn
+
+    @contextmanager
+    def transaction(self, immediate: bool = False) -> Iterator[sqlite3.Connection]:
+        # Nested calls join the outer transaction. `immediate` takes the write lock
+        # up front, so a read-then-write batch can't fail half way because another
+        # connection committed in between
+        with self._lock:
+            conn = self.connection
+            if conn.in_transaction:
+                yield conn
+                return
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        if self.pool_readers and threading.get_ident() != self._owner_thread:
+            yield self._thread_reader()
+            return
+        with self._lock:
+            yield self.connection
+
+    def _thread_reader(self) -> sqlite3.Connection:
+        reader = getattr(self._local, "reader", None)
+        if reader is None:
+            reader = _ThreadReader(self._open())
+            self._local.reader = reader
+            with self._lock:
+                self._readers.append(reader.conn)
+            weakref.finalize(reader, self._close_reader, reader.conn)
+        return reader.conn
+
+    def _close_reader(self, conn: sqlite3.Connection):
+        # Its thread has ended; close() may have got to it first
+        with self._lock:
+            if conn in self._readers:
+                self._readers.remove(conn)
+                conn.close()
+
+    def close(self):
+        with self._lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+            if self._conn is not None:
+                # Let SQLite refresh planner statistics for the indexes we used
+                self._conn.execute("PRAGMA optimize")
+                self._conn.close()
+                self._conn = None
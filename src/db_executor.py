@@ -0,0 +1,58 @@
+"""Runs database work off the Flet event handlers.
+
+SQLite allows one writer at a time, so every write goes through a single writer
+thread, in submission order. Reads go to a small pool of reader threads; with
+WAL (see ConnectionManager.PRAGMAS) and `pool_readers=True` each of them gets
+its own connection and they never wait for the writer. Handlers submit a
+callable and get a Future back, or await it in Flet's async mode, and hand the
+UI update to `on_result`, which runs it on the page's thread pool rather than
+on the database threads.
+"""
+
+import asyncio
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+class DBExecutor:
+    def __init__(self, readers: int = 2):
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self._readers = ThreadPoolExecutor(max_workers=readers, thread_name_prefix="db-reader")
+
+    def submit_write(self, fn: Callable, *args, **kwargs) -> Future:
+        return self._writer.submit(fn, *args, **kwargs)
+
+    def submit_read(self, fn: Callable, *args, **kwargs) -> Future:
+        return self._readers.submit(fn, *args, **kwargs)
+
+    async def write(self, fn: Callable, *args, **kwargs) -> Any:
+        return await asyncio.wrap_future(self.submit_write(fn, *args, **kwargs))
+
+    async def read(self, fn: Callable, *args, **kwargs) -> Any:
+        return await asyncio.wrap_future(self.submit_read(fn, *args, **kwargs))
+
+    @staticmethod
+    def on_result(future: Future, page, callback: Callable[[Any], None],
+                  on_error: Optional[Callable[[BaseException], None]] = None):
+        """Call `callback(result)` once the future is done, on the page's threads
+        (or directly if there's no page, e.g. in benchmarks)"""
+        def done(f: Future):
+            error = f.exception()
+            if error is not None:
+                if on_error is None:
+                    print(f"database task failed: {error!r}")
+                    return
+                handler, arg = on_error, error
+            else:
+                handler, arg = callback, f.result()
+            if page is not None:
+                page.run_thread(handler, arg)
+            else:
+                handler(arg)
+
+        future.add_done_callback(done)
+
+    def close(self, wait: bool = True):
+        # Pending writes are finished before the connections are closed
+        self._readers.shutdown(wait=wait)
+        self._writer.shutdown(wait=wait)
@@ -0,0 +1,31 @@
+"""Decoding of the date and time strings stored in attendance.db.
+
+Times are stored as "HH:MM" and dates as ISO "YYYY-MM-DD". A timetable only has
+a handful of distinct times and a history a few hundred distinct dates, so the
+parsers are memoized; date and time objects are immutable, so sharing them
+between rows is safe. fromisoformat is used instead of strptime, which is much
+slower, with strptime kept as a fallback for values written by hand (e.g. "9:00").
+"""
+
+from datetime import date, datetime, time
+from functools import lru_cache
+
+
+@lru_cache(maxsize=1024)
+def parse_time(value: str) -> time:
+    try:
+        return time.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, "%H:%M").time()
+
+
+@lru_cache(maxsize=8192)
+def parse_date(value: str) -> date:
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def format_time(value: time) -> str:
+    return value.strftime("%H:%M")
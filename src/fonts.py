@@ -0,0 +1,31 @@
+"""Bundled fonts for the apps.
+
+Inter is served from the Flet assets directory instead of rsms.me, so a cold
+start doesn't wait on a download and works offline. The files in
+assets/fonts are Inter subset by subset_fonts.py to the characters the app
+uses (SIL Open Font License, see assets/fonts/OFL.txt).
+
+If a font file is missing, its family is left out of page.fonts and Flutter
+renders text that asks for it in the platform's default font.
+"""
+
+from pathlib import Path
+from typing import Dict
+
+ASSETS_DIR = Path(__file__).resolve().parent / "assets"
+
+# Family -> file, relative to ASSETS_DIR
+FONT_FILES = {
+    "Inter": "fonts/Inter-Regular.woff2",
+    "Inter Bold": "fonts/Inter-Bold.woff2",
+}
+
+
+def page_fonts(assets_dir: Path = ASSETS_DIR) -> Dict[str, str]:
+    """page.fonts for the font files that are actually there"""
+    fonts = {}
+    for family, file in FONT_FILES.items():
+        if (assets_dir / file).is_file():
+            # A leading slash makes Flet load it from the assets directory
+            fonts[family] = "/" + file
+    return fonts
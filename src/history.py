@@ -0,0 +1,97 @@
+"""Columnar container for bulk attendance history.
+
+Loading years of attendance as record objects costs one Python object (plus a
+date, a time and an enum reference) per row. AttendanceHistory keeps the same
+rows as parallel typed arrays instead: ids, dates as ordinals and statuses as
+small integer codes, a few bytes per row. Rows can still be read back one at a
+time as immutable HistoryRow tuples.
+"""
+
+from array import array
+from datetime import date
+from typing import Dict, Iterable, Iterator, NamedTuple, Optional, Union
+
+from decoders import parse_date
+
+# Same values as CourseClassStatus; the code is the index
+STATUSES = ("Present", "Absent", "Cancelled", "Unset")
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+
+# Stored in place of a NULL id
+NO_ID = -1
+
+
+class HistoryRow(NamedTuple):
+    id: int
+    course_id: int
+    schedule_id: Optional[int]
+    extra_class_id: Optional[int]
+    date: date
+    status: str
+
+
+class AttendanceHistory:
+    __slots__ = ("ids", "course_ids", "schedule_ids", "extra_class_ids", "ordinals", "statuses")
+
+    def __init__(self):
+        self.ids = array("q")
+        self.course_ids = array("q")
+        self.schedule_ids = array("q")
+        self.extra_class_ids = array("q")
+        self.ordinals = array("l")
+        self.statuses = array("b")
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> "AttendanceHistory":
+        # Rows as stored in attendance: (id, course_id, schedule_id, extra_class_id, date, class_status)
+        history = cls()
+        for row in rows:
+            history.append(*row)
+        return history
+
+    def append(self, attendance_id: int, course_id: int, schedule_id: Optional[int],
+               extra_class_id: Optional[int], record_date: Union[date, str, int], status):
+        if isinstance(record_date, str):
+            record_date = parse_date(record_date)
+        if isinstance(record_date, date):
+            record_date = record_date.toordinal()
+        self.ids.append(attendance_id)
+        self.course_ids.append(course_id)
+        self.schedule_ids.append(NO_ID if schedule_id is None else schedule_id)
+        self.extra_class_ids.append(NO_ID if extra_class_id is None else extra_class_id)
+        self.ordinals.append(record_date)
+        # Accepts a CourseClassStatus or its value
+        self.statuses.append(STATUS_CODES[getattr(status, "value", status)])
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __getitem__(self, index: int) -> HistoryRow:
+        schedule_id = self.schedule_ids[index]
+        extra_class_id = self.extra_class_ids[index]
+        return HistoryRow(
+            self.ids[index], self.course_ids[index],
+            None if schedule_id == NO_ID else schedule_id,
+            None if extra_class_id == NO_ID else extra_class_id,
+            date.fromordinal(self.ordinals[index]), STATUSES[self.statuses[index]]
+        )
+
+    def __iter__(self) -> Iterator[HistoryRow]:
+        for index in range(len(self.ids)):
+            yield self[index]
+
+    def status_counts(self, course_id: Optional[int] = None) -> Dict[str, int]:
+        counts = [0] * len(STATUSES)
+        if course_id is None:
+            for code in self.statuses:
+                counts[code] += 1
+        else:
+            for cid, code in zip(self.course_ids, self.statuses):
+                if cid == course_id:
+                    counts[code] += 1
+        return dict(zip(STATUSES, counts))
+
+    def nbytes(self) -> int:
+        # Size of the array buffers, not counting the few fixed-size array headers
+        return sum(column.itemsize * len(column) for column in
+                   (self.ids, self.course_ids, self.schedule_ids, self.extra_class_ids, self.ordinals, self.statuses))
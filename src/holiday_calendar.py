@@ -0,0 +1,244 @@
+"""Holiday calendar: pluggable providers, a local SQLite cache and fast lookups.
+
+Providers are only asked for holidays when the cached copy is older than
+`max_age`. Each fetch is recorded in holiday_fetches, so a source without any
+holidays isn't asked again on every start. Everything else works off an
+in-memory sorted array of date ordinals, so checking a date or counting
+holidays in a range is a binary search.
+"""
+
+import bisect
+import datetime
+import os
+import sqlite3
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple, Union
+
+from db_connection import ConnectionManager
+from settings import get_setting
+
+Holiday = Tuple[datetime.date, str]
+
+DEFAULT_GOOGLE_CALENDAR = "en.indian#holiday@group.v.calendar.google.com"
+
+
+class HolidayProvider:
+    # Providers return (date, name) pairs for every holiday in [start_date, end_date]
+    source = "base"
+
+    def fetch(self, start_date: datetime.date, end_date: datetime.date) -> List[Holiday]:
+        raise NotImplementedError
+
+
+class StubHolidayProvider(HolidayProvider):
+    source = "stub"
+
+    def __init__(self, holidays: Union[Mapping[datetime.date, str], Iterable[datetime.date]] = ()):
+        if isinstance(holidays, Mapping):
+            self.holidays = dict(holidays)
+        else:
+            self.holidays = {day: "Holiday" for day in holidays}
+
+    def fetch(self, start_date: datetime.date, end_date: datetime.date) -> List[Holiday]:
+        return sorted((day, name) for day, name in self.holidays.items() if start_date <= day <= end_date)
+
+
+class ICSHolidayProvider(HolidayProvider):
+    """Reads all-day events from an iCalendar (.ics) file, e.g. an export of a
+    public holiday calendar. Multi-day events count every day they cover."""
+    source = "ics"
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def fetch(self, start_date: datetime.date, end_date: datetime.date) -> List[Holiday]:
+        holidays = []
+        for event in self._read_events():
+            first = _parse_ics_date(event.get("DTSTART"))
+            if first is None:
+                continue
+            # DTEND is exclusive for all-day events
+            last = _parse_ics_date(event.get("DTEND"))
+            last = last - datetime.timedelta(days=1) if last and last > first else first
+            day = max(first, start_date)
+            while day <= min(last, end_date):
+                holidays.append((day, event.get("SUMMARY", "Holiday")))
+                day += datetime.timedelta(days=1)
+        return sorted(holidays)
+
+    def _read_events(self) -> List[Dict[str, str]]:
+        with open(self.path, encoding="utf-8") as f:
+            # Unfold continuation lines (RFC 5545 3.1)
+            lines = []
+            for line in f.read().splitlines():
+                if line[:1] in (" ", "\t") and lines:
+                    lines[-1] += line[1:]
+                else:
+                    lines.append(line)
+
+        events = []
+        event = None
+        for line in lines:
+            if line == "BEGIN:VEVENT":
+                event = {}
+            elif line == "END:VEVENT":
+                if event is not None:
+                    events.append(event)
+                event = None
+            elif event is not None and ":" in line:
+                key, value = line.split(":", 1)
+                # Drop parameters like DTSTART;VALUE=DATE
+                event[key.split(";", 1)[0].upper()] = value.strip()
+        return events
+
+
+class GoogleCalendarHolidayProvider(HolidayProvider):
+    """Public holidays from a Google Calendar. googleapiclient pulls in httplib2,
+    google-auth and the discovery machinery, so it's imported on first fetch
+    rather than at startup."""
+    source = "google"
+
+    def __init__(self, api_key: str, calendar_id: str = DEFAULT_GOOGLE_CALENDAR):
+        self.api_key = api_key
+        self.calendar_id = calendar_id
+
+    def fetch(self, start_date: datetime.date, end_date: datetime.date) -> List[Holiday]:
+        from googleapiclient.discovery import build
+
+        service = build("calendar", "v3", developerKey=self.api_key, cache_discovery=False)
+        response = service.events().list(
+            calendarId=self.calendar_id,
+            timeMin=f"{start_date.isoformat()}T00:00:00Z",
+            timeMax=f"{(end_date + datetime.timedelta(days=1)).isoformat()}T00:00:00Z",
+            singleEvents=True,
+            maxResults=2500,
+        ).execute()
+
+        holidays = []
+        for item in response.get("items", []):
+            first = item.get("start", {}).get("date")
+            if not first:
+                continue
+            first = datetime.date.fromisoformat(first)
+            # End dates of all-day events are exclusive
+            last = item.get("end", {}).get("date")
+            last = datetime.date.fromisoformat(last) - datetime.timedelta(days=1) if last else first
+            day = max(first, start_date)
+            while day <= min(max(last, first), end_date):
+                holidays.append((day, item.get("summary", "Holiday")))
+                day += datetime.timedelta(days=1)
+        return sorted(holidays)
+
+
+def default_provider() -> HolidayProvider:
+    # Google Calendar if an API key is configured, then an .ics export, else no holidays
+    api_key = get_setting("GOOGLE_API_KEY")
+    if api_key:
+        return GoogleCalendarHolidayProvider(api_key, get_setting("GOOGLE_HOLIDAY_CALENDAR", DEFAULT_GOOGLE_CALENDAR))
+    ics_path = get_setting("HOLIDAYS_ICS")
+    if ics_path and os.path.exists(ics_path):
+        return ICSHolidayProvider(ics_path)
+    return StubHolidayProvider()
+
+
+def _parse_ics_date(value: Optional[str]) -> Optional[datetime.date]:
+    if not value or len(value) < 8:
+        return None
+    try:
+        return datetime.date(int(value[0:4]), int(value[4:6]), int(value[6:8]))
+    except ValueError:
+        return None
+
+
+class HolidayCalendar:
+    """Holidays for the app, cached in its database. The constructor only reads
+    the cache; asking the provider is up to the app, with fetch() off the writer
+    thread (it may go over the network) and save() on it."""
+
+    def __init__(self, db: ConnectionManager, provider: Optional[HolidayProvider] = None,
+                 max_age: datetime.timedelta = datetime.timedelta(days=30)):
+        self.db = db
+        self.provider = provider
+        self.max_age = max_age
+        self.ordinals: List[int] = []
+        self.names: Dict[int, str] = {}
+        self.fetched_at: Optional[str] = None
+
+        with self.db.transaction() as conn:
+            ensure_schema(conn)
+        self.load()
+
+    def stale(self) -> bool:
+        if self.provider is None:
+            return False
+        with self.db.reader() as conn:
+            row = conn.execute("SELECT fetched_at FROM holiday_fetches WHERE source = ?",
+                               (self.provider.source,)).fetchone()
+        return not row or datetime.datetime.now() - datetime.datetime.fromisoformat(row[0]) >= self.max_age
+
+    def fetch(self, start_date: datetime.date, end_date: datetime.date, force: bool = False) -> Optional[List[Holiday]]:
+        """Holidays from the provider if the cache is stale, else None. Nothing is written"""
+        if self.provider is None or not (force or self.stale()):
+            return None
+        try:
+            return self.provider.fetch(start_date, end_date)
+        except Exception as e:
+            # Offline or misconfigured: keep using whatever is cached
+            print(f"holidays can't be fetched from {self.provider.source}: {e}")
+            return None
+
+    def save(self, start_date: datetime.date, end_date: datetime.date, holidays: List[Holiday]):
+        """Replace the provider's cached holidays in the range with what fetch() returned"""
+        now = datetime.datetime.now().isoformat(timespec="seconds")
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM holidays WHERE source = ? AND date BETWEEN ? AND ?",
+                         (self.provider.source, start_date.isoformat(), end_date.isoformat()))
+            conn.executemany(
+                "INSERT OR REPLACE INTO holidays (date, source, name, fetched_at) VALUES (?, ?, ?, ?)",
+                [(day.isoformat(), self.provider.source, name, now) for day, name in holidays]
+            )
+            conn.execute("INSERT OR REPLACE INTO holiday_fetches (source, fetched_at) VALUES (?, ?)",
+                         (self.provider.source, now))
+        self.load()
+
+    def refresh(self, start_date: datetime.date, end_date: datetime.date, force: bool = False) -> bool:
+        """fetch() and save() on the calling thread; returns True if it fetched"""
+        holidays = self.fetch(start_date, end_date, force)
+        if holidays is None:
+            return False
+        self.save(start_date, end_date, holidays)
+        return True
+
+    def load(self):
+        with self.db.reader() as conn:
+            rows = conn.execute("SELECT date, MIN(name) FROM holidays GROUP BY date ORDER BY date").fetchall()
+            self.fetched_at = conn.execute("SELECT MAX(fetched_at) FROM holiday_fetches").fetchone()[0]
+
+        self.names = {datetime.date.fromisoformat(day).toordinal(): name for day, name in rows}
+        self.ordinals = sorted(self.names)
+
+    def is_holiday(self, day: datetime.date) -> bool:
+        ordinal = day.toordinal()
+        index = bisect.bisect_left(self.ordinals, ordinal)
+        return index < len(self.ordinals) and self.ordinals[index] == ordinal
+
+    def name(self, day: datetime.date) -> Optional[str]:
+        return self.names.get(day.toordinal())
+
+
+def ensure_schema(conn: sqlite3.Connection):
+    conn.execute("""CREATE TABLE IF NOT EXISTS holidays (
+        date TEXT NOT NULL,
+        source TEXT NOT NULL,
+        name TEXT,
+        fetched_at TEXT NOT NULL,
+        PRIMARY KEY (date, source)
+    )""")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_holidays_source_fetched ON holidays (source, fetched_at)")
+    # When each source was last asked, even if it had no holidays
+    conn.execute("""CREATE TABLE IF NOT EXISTS holiday_fetches (
+        source TEXT PRIMARY KEY,
+        fetched_at TEXT NOT NULL
+    )""")
+    # Older databases only have the fetch times on the stored holidays
+    conn.execute("""INSERT OR IGNORE INTO holiday_fetches (source, fetched_at)
+                    SELECT source, MAX(fetched_at) FROM holidays GROUP BY source""")
@@ -0,0 +1,279 @@
+"""Versioned migrations for attendance.db, tracked with PRAGMA user_version.
+
+The v1 tracker and DBOps can share a database file, but v1 keeps its data in
+subjects/slots/attendance_events (or, in older files, a flat `attendance`
+table that clashes with ours). The migrations here move that data into the
+courses/schedule/attendance tables.
+
+Every migration is a step function that does a bounded amount of work and
+returns True once it's finished. The migrator runs each call in its own short
+transaction and bumps user_version in the transaction of the final call, so
+the write lock is only held for one batch at a time and an interrupted
+migration resumes from its last committed batch.
+"""
+
+import sqlite3
+import threading
+import time as clock
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import calendar_math
+import v1_schema
+from db_connection import ConnectionManager
+from decoders import format_time, parse_date, parse_time
+
+# step(conn, batch_size, state) -> True when done. `state` lives for one run
+# and can hold lookups that are expensive to rebuild for every batch.
+Step = Callable[[sqlite3.Connection, int, Dict[str, Any]], bool]
+
+V1_STATUSES = {"present": "Present", "absent": "Absent"}
+
+
+def split_flat_attendance(conn: sqlite3.Connection, batch_size: int, state: Dict[str, Any]) -> bool:
+    # A flat v1 timetable is one row per weekly slot, so it's small enough to move in one go.
+    # It has to happen before DBOps creates its own attendance table.
+    if v1_schema.has_flat_attendance(conn):
+        v1_schema.ensure_schema(conn)
+    return True
+
+
+def import_v1(conn: sqlite3.Connection, batch_size: int, state: Dict[str, Any]) -> bool:
+    """Copy v1 subjects, slots and attendance events into courses, schedule and
+    attendance. Subjects and slots are matched to the rows created for them
+    through v1_import_map; events are read in rowid order from a saved position."""
+    if not _table_exists(conn, "subjects"):
+        return True
+
+    conn.execute("""CREATE TABLE IF NOT EXISTS v1_import_map (
+        kind TEXT NOT NULL,
+        v1_id INTEGER NOT NULL,
+        new_id INTEGER,
+        PRIMARY KEY (kind, v1_id)
+    )""")
+    _ensure_progress(conn)
+
+    if _import_subjects(conn, batch_size):
+        return False
+    if _import_slots(conn, batch_size):
+        return False
+    return not _import_events(conn, batch_size, state)
+
+
+def _import_subjects(conn: sqlite3.Connection, batch_size: int) -> int:
+    rows = conn.execute(
+        """SELECT id, name, req_attendance FROM subjects
+           WHERE id > (SELECT COALESCE(MAX(v1_id), 0) FROM v1_import_map WHERE kind = 'subject')
+           ORDER BY id LIMIT ?""", (batch_size,)).fetchall()
+    for subject_id, name, req_attendance in rows:
+        course_id = conn.execute(
+            "INSERT INTO courses (name, required_attendance_percentage) VALUES (?, ?)",
+            (name, float(req_attendance if req_attendance is not None else 75))
+        ).lastrowid
+        conn.execute("INSERT INTO v1_import_map (kind, v1_id, new_id) VALUES ('subject', ?, ?)",
+                     (subject_id, course_id))
+    return len(rows)
+
+
+def _import_slots(conn: sqlite3.Connection, batch_size: int) -> int:
+    rows = conn.execute(
+        """SELECT sl.id, m.new_id, sl.day, sl.timing FROM slots sl
+           JOIN v1_import_map m ON m.kind = 'subject' AND m.v1_id = sl.subject_id
+           WHERE sl.id > (SELECT COALESCE(MAX(v1_id), 0) FROM v1_import_map WHERE kind = 'slot')
+           ORDER BY sl.id LIMIT ?""", (batch_size,)).fetchall()
+    for slot_id, course_id, day, timing in rows:
+        schedule_id = None
+        times = _slot_times(timing)
+        try:
+            weekday = calendar_math.weekday_index(day)
+        except ValueError:
+            weekday = None
+        if weekday is not None and times is not None:
+            # v1 only records when a class starts; assume an hour
+            schedule_id = conn.execute(
+                "INSERT INTO schedule (course_id, weekday, start_time, end_time, included_in_schedule) VALUES (?, ?, ?, ?, 1)",
+                (course_id, weekday, times[0], times[1])
+            ).lastrowid
+        # Unusable slots are still recorded so the position moves past them
+        conn.execute("INSERT INTO v1_import_map (kind, v1_id, new_id) VALUES ('slot', ?, ?)",
+                     (slot_id, schedule_id))
+    return len(rows)
+
+
+def _import_events(conn: sqlite3.Connection, batch_size: int, state: Dict[str, Any]) -> int:
+    if not _table_exists(conn, "attendance_events"):
+        return 0
+    if "courses" not in state:
+        state["courses"], state["slots"] = _v1_lookups(conn)
+    courses, slots = state["courses"], state["slots"]
+
+    position = _get_position(conn, "v1_events")
+    events = conn.execute(
+        "SELECT rowid, subject, timing, date, status FROM attendance_events WHERE rowid > ? ORDER BY rowid LIMIT ?",
+        (position, batch_size)).fetchall()
+    if not events:
+        return 0
+
+    rows = []
+    for _, subject, timing, day, status in events:
+        course_id = courses.get((subject or "").lower())
+        try:
+            weekday = parse_date(day).weekday()
+        except (TypeError, ValueError):
+            continue
+        if course_id is None:
+            continue
+        schedule_id = slots.get((course_id, weekday, timing))
+        rows.append((schedule_id, day, V1_STATUSES.get(status, "Unset"), course_id, schedule_id, day))
+    # Skip classes that were already marked here; the course_stats triggers count the rest
+    conn.executemany(
+        """INSERT INTO attendance (schedule_id, date, class_status, course_id)
+           SELECT ?, ?, ?, ? WHERE NOT EXISTS (SELECT 1 FROM attendance WHERE schedule_id = ? AND date = ?)""",
+        rows
+    )
+    _set_position(conn, "v1_events", events[-1][0])
+    return len(events)
+
+
+def extra_class_attendance(conn: sqlite3.Connection, batch_size: int, state: Dict[str, Any]) -> bool:
+    """Statuses of extra classes used to be kept in extra_classes.class_status, where
+    the course aggregates never saw them. Copy the marked ones into attendance."""
+    if not _table_exists(conn, "extra_classes"):
+        return True
+    _ensure_progress(conn)
+    position = _get_position(conn, "extra_classes")
+    rows = conn.execute(
+        "SELECT id, date, class_status, course_id FROM extra_classes WHERE id > ? ORDER BY id LIMIT ?",
+        (position, batch_size)).fetchall()
+    if not rows:
+        return True
+
+    conn.executemany(
+        """INSERT INTO attendance (extra_class_id, date, class_status, course_id) VALUES (?, ?, ?, ?)
+           ON CONFLICT (extra_class_id, date) WHERE extra_class_id IS NOT NULL DO NOTHING""",
+        [row for row in rows if row[2] != "Unset"]
+    )
+    _set_position(conn, "extra_classes", rows[-1][0])
+    return len(rows) < batch_size
+
+
+def _v1_lookups(conn: sqlite3.Connection) -> Tuple[Dict[str, int], Dict[Tuple[int, int, str], int]]:
+    # subject name -> course id, (course id, weekday, v1 timing) -> schedule id
+    courses = {}
+    for name, course_id in conn.execute(
+            """SELECT s.name, m.new_id FROM subjects s
+               JOIN v1_import_map m ON m.kind = 'subject' AND m.v1_id = s.id"""):
+        courses[name.lower()] = course_id
+    slots = {}
+    for course_id, day, timing, schedule_id in conn.execute(
+            """SELECT cm.new_id, sl.day, sl.timing, sm.new_id FROM slots sl
+               JOIN v1_import_map cm ON cm.kind = 'subject' AND cm.v1_id = sl.subject_id
+               JOIN v1_import_map sm ON sm.kind = 'slot' AND sm.v1_id = sl.id
+               WHERE sm.new_id IS NOT NULL"""):
+        slots[(course_id, calendar_math.weekday_index(day), timing)] = schedule_id
+    return courses, slots
+
+
+def _slot_times(timing) -> Optional[Tuple[str, str]]:
+    try:
+        start = datetime.combine(date.min, parse_time(str(timing)))
+    except ValueError:
+        return None
+    end = min(start + timedelta(hours=1), start.replace(hour=23, minute=59))
+    return format_time(start.time()), format_time(end.time())
+
+
+def _ensure_progress(conn: sqlite3.Connection):
+    # Where a batched migration got to, committed together with each batch
+    conn.execute("""CREATE TABLE IF NOT EXISTS migration_progress (
+        name TEXT PRIMARY KEY,
+        position INTEGER NOT NULL
+    )""")
+
+
+def _get_position(conn: sqlite3.Connection, name: str) -> int:
+    row = conn.execute("SELECT position FROM migration_progress WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else 0
+
+
+def _set_position(conn: sqlite3.Connection, name: str, position: int):
+    conn.execute("INSERT OR REPLACE INTO migration_progress (name, position) VALUES (?, ?)", (name, position))
+
+
+def _table_exists(conn: sqlite3.Connection, name: str) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (name,)).fetchone() is not None
+
+
+# (version, description, step); a database at version N has had every step up to N applied
+MIGRATIONS: List[Tuple[int, str, Step]] = [
+    (1, "move a flat v1 attendance table into subjects and slots", split_flat_attendance),
+    (2, "import v1 subjects, slots and attendance", import_v1),
+    (3, "record extra class statuses in attendance", extra_class_attendance),
+]
+V1_SPLIT_VERSION = 1
+
+
+class Migrator:
+    def __init__(self, db: ConnectionManager, migrations: List[Tuple[int, str, Step]] = MIGRATIONS,
+                 batch_size: int = 500, pause: float = 0.01):
+        self.db = db
+        self.migrations = migrations
+        self.batch_size = batch_size
+        # Time between batches in which other connections and threads can write
+        self.pause = pause
+        self.longest_batch = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def version(self) -> int:
+        with self.db.reader() as conn:
+            return conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def pending(self, target: Optional[int] = None) -> List[Tuple[int, str, Step]]:
+        version = self.version
+        return [m for m in self.migrations if version < m[0] and (target is None or m[0] <= target)]
+
+    def run(self, target: Optional[int] = None) -> int:
+        """Apply pending migrations up to `target` (all by default). Returns the
+        version reached, which is lower than the target if stop() was called."""
+        for version, _, step in self.pending(target):
+            state: Dict[str, Any] = {}
+            done = False
+            while not done:
+                if self._stop.is_set():
+                    return self.version
+                started = clock.perf_counter()
+                with self.db.transaction(immediate=True) as conn:
+                    done = step(conn, self.batch_size, state)
+                    if done:
+                        conn.execute(f"PRAGMA user_version = {int(version)}")
+                self.longest_batch = max(self.longest_batch, clock.perf_counter() - started)
+                if not done and self.pause:
+                    clock.sleep(self.pause)
+        return self.version
+
+    def start(self, target: Optional[int] = None) -> threading.Thread:
+        # Runs the migrations on a daemon thread; call stop() before closing the database
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run_logged, args=(target,), daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def _run_logged(self, target: Optional[int]):
+        try:
+            self.run(target)
+        except Exception as e:
+            # The failed batch was rolled back; the next start picks up from there
+            print(f"migration stopped: {e}")
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def stop(self, wait: bool = True):
+        self._stop.set()
+        if wait and self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -4,19 +4,10 @@ conn = sqlite3.connect('attendance.db')
 c = conn.cursor()
 
 c.execute("""
-    SELECT *
-    FROM attendance a
-    WHERE rowid = (
-        SELECT MIN(rowid)
-        FROM attendance b
-        WHERE b.subject = a.subject
-    )
+    SELECT name, req_attendance, classes_held, classes_attended
+    FROM subjects
+    ORDER BY id
 """)
 
 rows = c.fetchall()
 print(rows)
-
-
-
-
-
@@ -0,0 +1,19 @@
+"""Settings from the environment, with .env support loaded on first use so
+python-dotenv isn't imported unless a setting is actually read."""
+
+import os
+from typing import Optional
+
+_dotenv_loaded = False
+
+
+def get_setting(name: str, default: Optional[str] = None) -> Optional[str]:
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        _dotenv_loaded = True
+        try:
+            from dotenv import load_dotenv
+            load_dotenv()
+        except Exception:
+            print("env can't be loaded")
+    return os.getenv(name, default)
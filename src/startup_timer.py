@@ -0,0 +1,30 @@
+import time
+from typing import Callable, List, Optional, Tuple
+
+
+class StartupTimer:
+    """Milestones of a cold start, in ms since the timer was created.
+
+    Create it as early as possible (before the database is opened), mark each
+    milestone as it happens and report once the page is fully loaded. The first
+    frame is marked when its update has been sent to the client; the client
+    still has to lay it out and paint it.
+    """
+
+    def __init__(self, start: Optional[float] = None):
+        self.start = time.perf_counter() if start is None else start
+        self.marks: List[Tuple[str, float]] = []
+
+    def mark(self, label: str) -> float:
+        elapsed = (time.perf_counter() - self.start) * 1000
+        self.marks.append((label, elapsed))
+        return elapsed
+
+    def elapsed(self, label: str) -> Optional[float]:
+        for name, ms in self.marks:
+            if name == label:
+                return ms
+        return None
+
+    def report(self, out: Callable[[str], None] = print):
+        out("startup: " + ", ".join(f"{label} {ms:.1f} ms" for label, ms in self.marks))
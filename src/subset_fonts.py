@@ -0,0 +1,67 @@
+"""Puts Inter into the app's assets (see fonts.py), optionally subset.
+
+Subsetting keeps only the characters the app can show: Latin with its
+accented letters (subject names are typed by the user), digits, and common
+punctuation. That cuts the woff2 files to a fraction of their size. It needs
+fontTools with brotli (`pip install fonttools[woff]`); without it, or with
+--full, the files are copied as they are, which only works for .woff2 sources.
+
+    python subset_fonts.py Inter-Regular.ttf Inter-Bold.ttf [--full]
+
+Inter is at https://rsms.me/inter/ (SIL Open Font License).
+"""
+
+import shutil
+import sys
+from pathlib import Path
+
+from fonts import ASSETS_DIR, FONT_FILES
+
+# Basic Latin, Latin-1 Supplement, Latin Extended-A, and general punctuation (dashes, quotes, bullet, ellipsis)
+UNICODES = [*range(0x20, 0x7F), *range(0xA0, 0x180), *range(0x2010, 0x2028)]
+
+
+def subset(source: Path, target: Path):
+    # Only needed here, never by the apps
+    from fontTools import subset as ft_subset
+
+    options = ft_subset.Options()
+    options.flavor = "woff2"
+    # Keep kerning and the usual OpenType features; drop hinting, which Flutter doesn't use
+    options.layout_features = ["kern", "liga", "calt", "tnum", "case"]
+    options.hinting = False
+    options.desubroutinize = True
+    font = ft_subset.load_font(str(source), options)
+    subsetter = ft_subset.Subsetter(options)
+    subsetter.populate(unicodes=UNICODES)
+    subsetter.subset(font)
+    ft_subset.save_font(font, str(target), options)
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    full = "--full" in sys.argv
+    if len(args) != len(FONT_FILES):
+        sys.exit(f"usage: python subset_fonts.py {' '.join(f'<{family}>' for family in FONT_FILES)} [--full]")
+
+    if not full:
+        try:
+            import fontTools  # noqa: F401
+        except ImportError:
+            print("fontTools is not installed, copying the fonts without subsetting")
+            full = True
+
+    for source, (family, file) in zip(map(Path, args), FONT_FILES.items()):
+        target = ASSETS_DIR / file
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if full:
+            if source.suffix != ".woff2":
+                sys.exit(f"{source}: only .woff2 files can be copied as they are")
+            shutil.copyfile(source, target)
+        else:
+            subset(source, target)
+        print(f"{family}: {source.stat().st_size / 1024:.0f} KB -> {target.stat().st_size / 1024:.0f} KB ({target})")
+
+
+if __name__ == "__main__":
+    main()
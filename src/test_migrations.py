@@ -0,0 +1,180 @@
+"""v1 import: resuming after an interruption, importing every event exactly
+once, not mixing the sample course into imported data, and keeping the
+attended counts of a flat v1 table.
+
+    python -m pytest -q test_migrations.py
+"""
+
+import sqlite3
+from datetime import date, timedelta
+
+import pytest
+
+import v1_schema
+from AI import AttendanceTrackerApp, DBOps
+from migrations import MIGRATIONS, Migrator
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+SUBJECTS = 6
+DAYS = 120
+
+
+def build_v1(db_path) -> int:
+    # Every subject meets three times a week and every class is marked, alternating present/absent
+    conn = sqlite3.connect(db_path)
+    with conn:
+        v1_schema.ensure_schema(conn)
+        for n in range(SUBJECTS):
+            conn.execute("INSERT INTO subjects (name, req_attendance) VALUES (?, 75)", (f"Subject {n}",))
+            for day in WEEKDAYS[n % 3:n % 3 + 5:2]:
+                conn.execute("INSERT INTO slots (subject_id, day, timing) SELECT id, ?, ? FROM subjects WHERE name = ?",
+                             (day, f"{9 + n:02d}:00", f"Subject {n}"))
+        timetable = conn.execute(
+            "SELECT s.name, sl.day, sl.timing FROM slots sl JOIN subjects s ON s.id = sl.subject_id").fetchall()
+        events = []
+        start = date.today() - timedelta(days=DAYS)
+        for offset in range(DAYS):
+            day = start + timedelta(days=offset)
+            for subject, weekday, timing in timetable:
+                if weekday == WEEKDAYS[day.weekday()]:
+                    events.append((subject, timing, day.isoformat(), "present" if len(events) % 2 else "absent"))
+        conn.executemany("INSERT INTO attendance_events VALUES (?, ?, ?, ?)", events)
+    conn.close()
+    return len(events)
+
+
+def expected_presents(db_path):
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT subject, COUNT(*) FROM attendance_events WHERE status = 'present' GROUP BY subject")
+    presents = dict(rows.fetchall())
+    conn.close()
+    return presents
+
+
+def imported(db_ops: DBOps):
+    with db_ops.db.reader() as conn:
+        rows = conn.execute("SELECT COUNT(*) FROM attendance").fetchone()[0]
+        duplicates = conn.execute("""SELECT COUNT(*) FROM (SELECT 1 FROM attendance
+                                     GROUP BY schedule_id, date HAVING COUNT(*) > 1)""").fetchone()[0]
+        presents = dict(conn.execute("""SELECT c.name, s.presents FROM courses c
+                                        JOIN course_stats s ON s.course_id = c.id
+                                        WHERE s.presents > 0""").fetchall())
+        courses = conn.execute("SELECT COUNT(*) FROM courses").fetchone()[0]
+    return rows, duplicates, presents, courses
+
+
+@pytest.fixture
+def v1_db(tmp_path, monkeypatch):
+    # DBOps runs the import on a background thread; the tests drive it themselves
+    monkeypatch.setattr(Migrator, "start", lambda self, target=None: None)
+    db_path = str(tmp_path / "v1.db")
+    events = build_v1(db_path)
+    db_ops = DBOps(db_path)
+    yield db_ops, events, expected_presents(db_path)
+    db_ops.close()
+
+
+def interrupted_migrations(migrator: Migrator, batches: int):
+    # The real steps, stopping the migrator once `batches` batches have run
+    calls = {"n": 0}
+
+    def wrap(step):
+        def interrupting(conn, batch_size, state):
+            calls["n"] += 1
+            if calls["n"] >= batches:
+                migrator.stop(wait=False)
+            return step(conn, batch_size, state)
+        return interrupting
+
+    return [(version, description, wrap(step)) for version, description, step in MIGRATIONS]
+
+
+def test_import_resumes_after_interruption(v1_db):
+    db_ops, events, presents = v1_db
+    migrator = Migrator(db_ops.db, batch_size=20, pause=0)
+    migrator.migrations = interrupted_migrations(migrator, batches=6)
+    version = migrator.run()
+
+    assert version < MIGRATIONS[-1][0]
+    rows, _, _, _ = imported(db_ops)
+    assert 0 < rows < events
+
+    assert Migrator(db_ops.db, batch_size=20, pause=0).run() == MIGRATIONS[-1][0]
+    rows, duplicates, imported_presents, courses = imported(db_ops)
+    assert rows == events
+    assert duplicates == 0
+    assert imported_presents == presents
+    assert courses == SUBJECTS
+
+
+def test_import_runs_exactly_once(v1_db):
+    db_ops, events, presents = v1_db
+    Migrator(db_ops.db, batch_size=50, pause=0).run()
+    first = imported(db_ops)
+
+    # Rewind as if the version stamp and saved position had been lost
+    with db_ops.db.transaction() as conn:
+        conn.execute("PRAGMA user_version = 1")
+        conn.execute("DELETE FROM migration_progress")
+    Migrator(db_ops.db, batch_size=50, pause=0).run()
+
+    assert imported(db_ops) == first
+    assert first[0] == events and first[1] == 0 and first[2] == presents
+
+
+def test_no_sample_course_in_v1_database(v1_db):
+    db_ops, _, _ = v1_db
+    app = AttendanceTrackerApp(db_ops.db_path)
+    try:
+        # Before the import has committed anything
+        app._add_sample_data()
+        with app.db_ops.db.reader() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM courses WHERE name = 'Sample Course'").fetchone()[0] == 0
+    finally:
+        app.close()
+
+
+def flat_v1(db_path):
+    # The v1 layout before subjects/slots: one row per slot, counters repeated on each
+    conn = sqlite3.connect(db_path)
+    with conn:
+        conn.execute("""CREATE TABLE attendance (subject text, req_attendance INTEGER, day text,
+                        timing INTEGER, classes_held INTEGER, classes_attended INTEGER)""")
+        conn.executemany("INSERT INTO attendance VALUES (?, ?, ?, ?, ?, ?)", [
+            ("Maths", 75, "Monday", "09:00", 10, 3),
+            ("Maths", 75, "Wednesday", "09:00", 10, 3),
+            ("English", 75, "Tuesday", "10:00", 9, 5),
+        ])
+    return conn
+
+
+def attended(conn, start, end):
+    with conn:
+        conn.execute(v1_schema.ATTENDED_SQL, (start, end))
+    return dict(conn.execute("SELECT name, classes_attended FROM subjects").fetchall())
+
+
+def test_flat_attended_counts_survive_recompute(tmp_path):
+    conn = flat_v1(str(tmp_path / "flat.db"))
+    with conn:
+        v1_schema.ensure_schema(conn)
+        conn.execute("INSERT INTO attendance_events VALUES ('Maths', '09:00', '2025-09-01', 'present')")
+    try:
+        assert attended(conn, "2025-08-04", "2025-12-12") == {"Maths": 4, "English": 5}
+    finally:
+        conn.close()
+
+
+def test_legacy_attended_added_to_migrated_database(tmp_path):
+    # Migrated before legacy_attended existed, with the counts since recomputed from events
+    conn = flat_v1(str(tmp_path / "flat.db"))
+    with conn:
+        v1_schema.ensure_schema(conn)
+        conn.execute("ALTER TABLE subjects DROP COLUMN legacy_attended")
+        conn.execute("UPDATE subjects SET classes_attended = 0")
+    with conn:
+        v1_schema.ensure_schema(conn)
+    try:
+        assert attended(conn, "2025-08-04", "2025-12-12") == {"Maths": 3, "English": 5}
+    finally:
+        conn.close()
@@ -1,21 +1,17 @@
 import flet as ft
 import datetime
-import sqlite3
-import os
-from googleapiclient.discovery import build
+import calendar_math
+import fonts
+import v1_schema
+from write_behind import WriteBehindQueue
+from db_connection import ConnectionManager
+from db_executor import DBExecutor
+from holiday_calendar import HolidayCalendar, default_provider
 
 """For the last build major of the important backend is done, 
- I have imported google calendar but not used it to check for 
- holidays need to do that and refine the UI for future use"""
-
-# Load environment variables from .env if available
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except Exception:
-    print("env can't be loaded")
-
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY", "AIzaSyDUMMY-EXAMPLE-KEY-DEFAULT")
+ holidays come from holiday_calendar (Google Calendar, an .ics export or none),
+ configured through GOOGLE_API_KEY / HOLIDAYS_ICS in the environment or .env.
+ Heavy optional dependencies are imported lazily there, keep it that way"""
 
 class tracker:
     def __init__(self, page: ft.Page):
@@ -23,19 +19,29 @@ class tracker:
         self.page.title = "Attendance Tracker"
         self.page.bgcolor = "#0a0a0a"
         self.page.padding = 0
-        self.page.fonts = {
-            "Inter": "https://rsms.me/inter/font-files/Inter-Regular.woff2",
-            "Inter Bold": "https://rsms.me/inter/font-files/Inter-Bold.woff2"
-        }
+        # Bundled with the app; falls back to the system font if the files are missing
+        self.page.fonts = fonts.page_fonts()
 
-        self.conn = sqlite3.connect("attendance.db")
-        self.c = self.conn.cursor()
+        # Every write goes through the executor's writer thread. The connections are
+        # opened there, so that thread owns the write connection and every Flet
+        # handler thread reads through its own WAL connection without waiting on it
+        self.db_path = "attendance.db"
+        self.io = DBExecutor(readers=1)
+        self.db = self.io.submit_write(ConnectionManager, self.db_path, pool_readers=True).result()
 
         self.sem_date = datetime.date(2025, 8, 4)
+        self.sem_end = datetime.date(2025, 12, 12)  # Last day of classes, for the chart screen projections
+        self.holiday_end = datetime.date(2030, 12, 31)  # Holidays are fetched up to here
         self.attend_val = 75
         self.class_duration = 55
         self.weekdays = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
         self.selected_date = datetime.date.today()  # Initialize selected date for calendar widget
+        self.class_cards = []  # (card, present_btn, absent_btn) for the classes on the home screen
+        self._timetable = None  # weekday -> slots sorted by timing, see timetable()
+        self._counters = None  # subject -> (req_attendance, classes_held, classes_attended), see counters()
+        self._marked = {}  # ISO date -> {(subject, timing)} already marked, see marked_on()
+        self._recomputed_stamp = None
+        self.screen = None  # the show_* method of the screen on display
 
         self.content_column = ft.Column(spacing= 10, expand= True)
         self.scroll_view = ft.Container(
@@ -126,30 +132,175 @@ class tracker:
             expand=True
         )
 
-        self.conn.execute("""CREATE TABLE IF NOT EXISTS attendance (
-            subject text,
-            req_attendance INTEGER,
-            day text,
-            timing INTEGER,
-            classes_held INTEGER,
-            classes_attended INTEGER
-        )""")
+        # Subjects and their weekly slots; an old flat attendance table is migrated here
+        with self.db.transaction() as conn:
+            v1_schema.ensure_schema(conn)
 
-        self.conn.commit()
+        # Holidays are cached in the database and drawn from the cache straight away;
+        # the provider is only asked when the cache is stale, after the first paint
+        self.holidays = HolidayCalendar(self.db)
 
+        # Present/Absent taps are written in the background, batched and coalesced
+        self.attendance_queue = WriteBehindQueue(self.write_attendance_events, schedule=self.write_later)
+
+        self.page.on_close = self.on_close
         self.page.add(self.main_stack)
         self.page.overlay.append(self.fab)
         self.show_homepage(None)
+        self.refresh_holidays()
+
+    def refresh_holidays(self):
+        """Ask the provider for holidays on a reader thread, so a slow or offline
+        provider doesn't hold up startup or the writer. If it fetched, the cache
+        and the counters are updated on the writer thread and the screen on
+        display is drawn again."""
+        future = self.io.submit_read(self.fetch_holidays)
+        DBExecutor.on_result(future, self.page, lambda changed: self.redraw(self.screen, changed))
+        return future
+
+    def fetch_holidays(self):
+        # The provider reads its settings (and .env) here, off the UI thread. The
+        # executor finishes its reader tasks before its writer, so this can't outlive it
+        self.holidays.provider = default_provider()
+        holidays = self.holidays.fetch(self.sem_date, self.holiday_end)
+        if holidays is None:
+            return False
+        return self.io.submit_write(self.save_holidays, holidays).result()
+
+    def save_holidays(self, holidays):
+        # Runs on the writer thread; True if the counters changed
+        self.holidays.save(self.sem_date, self.holiday_end, holidays)
+        return self.update_db()
+
+    def write_later(self, fn, *args):
+        # Runs fn on the writer thread; a failure is reported
+        future = self.io.submit_write(fn, *args)
+        DBExecutor.on_result(future, None, lambda _: None)
+        return future
+
+    def on_close(self, e):
+        # The last taps are written on the writer thread too, then pending
+        # writes finish before the connections are closed
+        self.io.submit_write(self.attendance_queue.close).result()
+        self.io.close()
+        self.db.close()
+
+    def sync(self, screen=None):
+        """Write pending taps and bring classes_held up to date on the writer thread.
+        If that changed anything and `screen` is still on display, it's drawn again."""
+        future = self.io.submit_write(self.write_pending)
+        DBExecutor.on_result(future, self.page, lambda changed: self.redraw(screen, changed))
+        return future
+
+    def redraw(self, screen, changed):
+        # Draw the screen again with the new counters, unless the user has moved on
+        if changed and screen is not None and self.screen == screen:
+            screen(None)
+
+    def write_pending(self):
+        # Runs on the writer thread; True if the counters changed
+        written = bool(self.attendance_queue.pending())
+        self.attendance_queue.flush()
+        return self.update_db() or written
 
     def update_db(self):
-        self.c.execute("Select * FROM attendance")
-        items = self.c.fetchall()
-        self.conn.commit()
-        for item in items:
-            self.c.execute("UPDATE attendance SET classes_held = ? WHERE subject =?", (self.classes_held(self.sem_date, datetime.date.today(), item[0]), item[0]))
-            self.conn.commit()
-
+        # Recompute classes_held for every subject in one transaction, and skip
+        # the write entirely if it was already done today for this semester.
+        # Runs on the writer thread (see sync); returns True if it wrote
+        end_date = self.counted_until()
+        # "slots": the counters are per slot (see v1_schema.ATTENDED_SQL); older stamps counted per weekday
+        stamp = f"slots:{self.sem_date.isoformat()}:{end_date.isoformat()}:{self.holidays.fetched_at}"
+        if stamp == self._recomputed_stamp:
+            return False
+        with self.db.reader() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'classes_held_recomputed'").fetchone()
+            if row and row[0] == stamp:
+                self._recomputed_stamp = stamp
+                return False
+            subjects = conn.execute("SELECT name FROM subjects").fetchall()
+
+        held = calendar_math.count_classes_bulk(self.sem_date, end_date, self.load_schedule(), self.holidays.ordinals)
+        updates = []
+        for (subject,) in subjects:
+            count = held.get(subject.lower(), 0)
+            updates.append((count, subject, count))
+
+        with self.db.transaction() as conn:
+            conn.executemany(
+                "UPDATE subjects SET classes_held = ? WHERE name = ? AND classes_held IS NOT ?", updates)
+            # Events dated today become countable as the days go by
+            conn.execute(v1_schema.ATTENDED_SQL, self.attended_range())
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('classes_held_recomputed', ?)", (stamp,))
+        self._recomputed_stamp = stamp
+        self.refresh_counters()
+        return True
+
+    def timetable(self):
+        # weekday -> (subject, req_attendance, day, timing) sorted by timing. Loaded once
+        # and reused for every date until a course is added, so date navigation needs no SQL
+        if self._timetable is None:
+            with self.db.reader() as conn:
+                rows = conn.execute(v1_schema.SLOT_ROWS_SQL + " ORDER BY sl.timing").fetchall()
+            timetable = {day: [] for day in self.weekdays}
+            for row in rows:
+                timetable.setdefault(row[2], []).append(row)
+            self._timetable = timetable
+        return self._timetable
+
+    def invalidate_timetable(self):
+        self._timetable = None
+
+    def counted_until(self):
+        # Classes are counted up to today, or up to the end of the semester once it's over,
+        # which is where the chart screen's projections stop too
+        return min(datetime.date.today(), self.sem_end)
+
+    def attended_range(self):
+        # Parameters of v1_schema.ATTENDED_SQL
+        return self.sem_date.isoformat(), self.counted_until().isoformat()
+
+    def counters(self):
+        # Kept current by the writers (refresh_counters), so the screens don't query them
+        if self._counters is None:
+            self.refresh_counters()
+        return self._counters
+
+    def refresh_counters(self):
+        # Called after every write that changes classes_held or classes_attended
+        with self.db.reader() as conn:
+            rows = conn.execute(v1_schema.COUNTERS_SQL).fetchall()
+        self._counters = {subject: (req, held, attended) for subject, req, held, attended in rows}
+
+    def marked_on(self, day):
+        # (subject, timing) pairs already marked on `day`
+        if day.isoformat() not in self._marked:
+            self.prefetch_marked(day - datetime.timedelta(days=1), day + datetime.timedelta(days=1))
+        return self._marked[day.isoformat()]
+
+    def prefetch_marked(self, start_date, end_date):
+        # Load the marked classes for every uncached date in the range with one query
+        days = []
+        current_date = start_date
+        while current_date <= end_date:
+            if current_date.isoformat() not in self._marked:
+                days.append(current_date.isoformat())
+            current_date += datetime.timedelta(days=1)
+        if not days:
+            return
 
+        with self.db.reader() as conn:
+            rows = conn.execute("SELECT date, subject, timing FROM attendance_events WHERE date BETWEEN ? AND ?",
+                                (days[0], days[-1])).fetchall()
+        marked = {day: set() for day in days}
+        for date, subject, timing in rows:
+            if date in marked:
+                marked[date].add((subject, timing))
+        self._marked.update(marked)
+
+    def shift_date(self, days):
+        self.selected_date = max(self.sem_date, self.selected_date + datetime.timedelta(days=days))
+        self.show_homepage(None)
 
     def create_sub_screen(self, e):
         # Create the overlay screen
@@ -337,12 +488,25 @@ class tracker:
         btn = e.control
         data = getattr(btn, "data", {}) or {}
         card = data.get("card")
-        present_btn = data.get("present_btn")
-        absent_btn = data.get("absent_btn")
 
         if not card:
             return
 
+        # Record the tap; the queue writes it to the database after a short debounce
+        self.attendance_queue.put((data["subject"], data["timing"], self.selected_date.isoformat()), data["status"])
+        self.marked_on(self.selected_date).add((data["subject"], data["timing"]))
+
+        self.mark_card(card, data.get("present_btn"), data.get("absent_btn"))
+
+        # Move the card to the bottom of the list
+        try:
+            if card in self.content_column.controls:
+                self.content_column.controls.remove(card)
+                self.content_column.controls.append(card)
+        finally:
+            self.page.update()
+
+    def mark_card(self, card, present_btn, absent_btn):
         # Grey out the card and reduce emphasis
         card.bgcolor = "#1f1f1f"
         card.opacity = 0.6
@@ -356,13 +520,18 @@ class tracker:
                 if isinstance(b.content, ft.Text):
                     b.content.color = "#9a9a9a"
 
-        # Move the card to the bottom of the list
-        try:
-            if card in self.content_column.controls:
-                self.content_column.controls.remove(card)
-                self.content_column.controls.append(card)
-        finally:
-            self.page.update()
+    def write_attendance_events(self, items):
+        # The write-behind queue flushes on the writer thread (see write_later), or at exit
+        with self.db.transaction() as conn:
+            conn.executemany(
+                """INSERT INTO attendance_events (subject, timing, date, status) VALUES (?, ?, ?, ?)
+                   ON CONFLICT (subject, timing, date) DO UPDATE SET status = excluded.status""",
+                [(subject, timing, date, status) for (subject, timing, date), status in items]
+            )
+            subjects = sorted({subject for (subject, _, _), _ in items})
+            conn.executemany(v1_schema.ATTENDED_SQL + " WHERE name = ?",
+                             [(*self.attended_range(), subject) for subject in subjects])
+        self.refresh_counters()
 
     def on_attendance_change(self, e):
         # Handle attendance percentage change
@@ -401,8 +570,7 @@ class tracker:
         def save_time(e, day, current_time):
             time_str = current_time.value.strftime("%H:%M")
             print(self.course_name.value, day, time_str, self.attend_val)
-            self.c.execute("INSERT INTO attendance (subject, req_attendance, day, timing, classes_held, classes_attended) VALUES (?, ?, ?, ?,?,?)", (self.course_name.value, self.attend_val,day,time_str, 0,0))
-            self.conn.commit()
+            self.io.submit_write(self.write_slot, self.course_name.value, self.attend_val, day, time_str)
 
         for day in self.selected_days:
             tp = ft.TimePicker(
@@ -442,23 +610,40 @@ class tracker:
         self.bs.content = ft.Column(rows, tight=True)
         self.bs.update()
 
+    def write_slot(self, subject, req_attendance, day, timing):
+        # Runs on the writer thread
+        with self.db.transaction() as conn:
+            conn.execute("INSERT OR IGNORE INTO subjects (name, req_attendance) VALUES (?, ?)", (subject, req_attendance))
+            conn.execute("INSERT OR IGNORE INTO slots (subject_id, day, timing) SELECT id, ?, ? FROM subjects WHERE name = ?",
+                         (day, timing, subject))
+            # Timetable changed, so classes_held has to be recomputed on the next update_db
+            conn.execute("DELETE FROM meta WHERE key = 'classes_held_recomputed'")
+        self._recomputed_stamp = None
+        self.invalidate_timetable()
+        self.refresh_counters()
+
     def save_course(self, e):
         self.close_overlay_screen(e)
         self.show_homepage(None)
 
-    def classes_held(self, start_date, end_date, subject):
-        self.c.execute("SELECT * FROM attendance WHERE subject = ? COLLATE NOCASE", (subject,))
-        items = self.c.fetchall()
-        schedule = []
-        for item in items:
-            schedule.append(item[2])
-        total = 0
-        current_date = start_date
-        while current_date <= end_date:
-            if current_date.strftime("%A") in schedule:
-                total = total +1
-            current_date += datetime.timedelta(days=1)
-        return total
+    def load_schedule(self):
+        # subject -> the weekday of each of its slots, so a subject with two Monday
+        # slots lists Monday twice and is counted twice per Monday, like its events
+        schedule = {}
+        for day, slots in self.timetable().items():
+            try:
+                weekday = calendar_math.weekday_index(day)
+            except ValueError:
+                continue
+            for subject, _, _, _ in slots:
+                schedule.setdefault(subject.lower(), []).append(weekday)
+        return schedule
+
+    def classes_held(self, start_date, end_date, subject, schedule=None):
+        if schedule is None:
+            schedule = self.load_schedule()
+        return calendar_math.count_classes(start_date, end_date, schedule.get(subject.lower(), ()),
+                                           self.holidays.ordinals)
 
     def get_greeting(self):
         hour = datetime.datetime.now().hour
@@ -470,7 +655,8 @@ class tracker:
             return "Good evening"
 
     def show_homepage(self,e):
-        self.update_db()
+        self.screen = self.show_homepage
+        self.sync(self.show_homepage)
         self.page.update()
         self.content_column.controls.clear()
 
@@ -537,12 +723,23 @@ class tracker:
             content=ft.Row(
                 alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
                 controls=[
+                    ft.IconButton(
+                        icon=ft.Icons.CHEVRON_LEFT_ROUNDED,
+                        icon_color="#e0e0e0",
+                        on_click=lambda e: self.shift_date(-1)
+                    ),
                     ft.Text(
                         f"{self.selected_date.strftime('%A, %B %d, %Y')}",
                         size=18,
                         color="#ffffff",
                         font_family="Inter",
-                        weight="w600"
+                        weight="w600",
+                        expand=True
+                    ),
+                    ft.IconButton(
+                        icon=ft.Icons.CHEVRON_RIGHT_ROUNDED,
+                        icon_color="#e0e0e0",
+                        on_click=lambda e: self.shift_date(1)
                     ),
                     ft.IconButton(
                         icon=ft.Icons.CALENDAR_TODAY_ROUNDED,
@@ -562,14 +759,19 @@ class tracker:
 
         # Get classes for the selected date (only if after semester start)
         selected_day = self.selected_date.strftime("%A")
-        self.c.execute("SELECT * FROM attendance WHERE day = ?", (selected_day,))
-        items = self.c.fetchall()
+        holiday = self.holidays.name(self.selected_date)
+        items = [] if holiday else self.timetable().get(selected_day, [])
+        marked = self.marked_on(self.selected_date)
+        counters = self.counters()
+        marked_cards = []
+        self.class_cards = []
 
         if items:
             for item in items:
-                subject, req_attendance, day, timing, classes_held, classes_attended = item
+                subject, req_attendance, day, timing = item
+                _, classes_held, classes_attended = counters.get(subject, (req_attendance, 0, 0))
 
-                att_per = round((classes_attended/classes_held) * 100)
+                att_per = round((classes_attended/classes_held) * 100) if classes_held else 100
 
                 # Buttons (handlers wired to shared logic)
                 absent_btn = ft.Container(
@@ -661,12 +863,24 @@ class tracker:
                 )
 
                 # Pass references via each button's data for shared handler use
-                absent_btn.data = {"card": sub_card, "present_btn": present_btn, "absent_btn": absent_btn, "status": "absent"}
-                present_btn.data = {"card": sub_card, "present_btn": present_btn, "absent_btn": absent_btn, "status": "present"}
-                self.content_column.controls.extend([sub_card])
+                absent_btn.data = {"card": sub_card, "present_btn": present_btn, "absent_btn": absent_btn,
+                                   "subject": subject, "timing": timing, "status": "absent"}
+                present_btn.data = {"card": sub_card, "present_btn": present_btn, "absent_btn": absent_btn,
+                                    "subject": subject, "timing": timing, "status": "present"}
+                self.class_cards.append((sub_card, present_btn, absent_btn))
+                if (subject, timing) in marked:
+                    # Already marked for this date, shown greyed out at the bottom
+                    self.mark_card(sub_card, present_btn, absent_btn)
+                    marked_cards.append(sub_card)
+                else:
+                    self.content_column.controls.extend([sub_card])
+
+            self.content_column.controls.extend(marked_cards)
 
         else:  # No classes for selected date
             date_display = "today" if self.selected_date == datetime.date.today() else f"on {self.selected_date.strftime('%A')}"
+            if holiday:
+                date_display = f"{date_display}, {holiday}"
             self.content_column.controls.extend( [
                 ft.Container(
                     padding=ft.Padding(20, 40, 20, 0),
@@ -683,8 +897,13 @@ class tracker:
 
         self.page.update()
 
+        # Warm the neighbouring days so prev/next renders without a query
+        self.prefetch_marked(self.selected_date - datetime.timedelta(days=1),
+                             self.selected_date + datetime.timedelta(days=1))
+
     def show_chart_screen(self, e):
-        self.update_db()
+        self.screen = self.show_chart_screen
+        self.sync(self.show_chart_screen)
         self.page.update()
         self.content_column.controls.clear()
 
@@ -692,13 +911,13 @@ class tracker:
         self.list_icon.bgcolor = None
         self.chart_icon.bgcolor = "#404040"
 
-        self.c.execute("""SELECT * FROM attendance a WHERE rowid = (SELECT MIN(rowid) FROM attendance b WHERE b.subject = a.subject)""" )
-        rows = self.c.fetchall()
+        rows = [(subject, *counters) for subject, counters in self.counters().items()]
+        projection = self.project_subjects(rows)
 
         if rows:
-            for item in rows:
-                subject, req_attendance, day, timing, classes_held, classes_attended = item
-                att_per = round((classes_attended/classes_held) * 100)
+            for index, item in enumerate(rows):
+                subject, req_attendance, classes_held, classes_attended = item
+                att_per = round((classes_attended/classes_held) * 100) if classes_held else 100
 
                 sub_card = ft.Container(
                     margin=ft.Margin(10, 0, 10, 10),
@@ -745,6 +964,13 @@ class tracker:
                         ]
                     )
                 )
+                if projection is not None:
+                    sub_card.content.controls.append(ft.Text(
+                        self.projection_hint(projection, index),
+                        size=13,
+                        color="#9a9a9a",
+                        font_family="Inter"
+                    ))
 
                 self.content_column.controls.extend([sub_card])
 
@@ -765,6 +991,43 @@ class tracker:
 
         self.page.update()
 
+    def project_subjects(self, rows):
+        # Projections for every subject on the chart screen in one go, None without NumPy.
+        # analytics pulls in NumPy, so it's imported on first use rather than at startup
+        if not rows:
+            return None
+        try:
+            import analytics
+        except ImportError:
+            return None
+        schedule = self.load_schedule()
+        _, matrix = analytics.weekday_matrix({subject: schedule.get(subject.lower(), ()) for subject, _, _, _ in rows})
+        # Today's classes are already counted as held
+        start_date = max(datetime.date.today() + datetime.timedelta(days=1), self.sem_date)
+        remaining = analytics.remaining_classes(matrix, start_date, self.sem_end, self.holidays.ordinals)
+        return analytics.project(
+            [held or 0 for _, _, held, _ in rows],
+            [attended or 0 for _, _, _, attended in rows],
+            [req or 0 for _, req, _, _ in rows],
+            remaining,
+            keys=[subject for subject, _, _, _ in rows],
+        )
+
+    def projection_hint(self, projection, index):
+        required = round(projection.required_percent[index])
+        streak = projection.required_streak[index]
+        if streak == float("inf"):
+            hint = f"{required}% can't be reached any more"
+        elif streak > 0:
+            hint = f"Attend the next {int(streak)} to get back to {required}%"
+        elif projection.max_skippable[index] == float("inf"):
+            hint = "No attendance requirement"
+        else:
+            hint = f"Can skip {int(projection.max_skippable[index])} and stay above {required}%"
+        if projection.remaining[index] > 0:
+            hint += f" · {round(projection.final_percent[index])}% at the end if you attend everything left"
+        return hint
+
     def show_date_picker(self, e):
         """Show date picker dialog to select a date"""
         def date_changed(e):
@@ -785,21 +1048,55 @@ class tracker:
         self.page.open(date_picker)
 
     def mark_all_present(self, e):
-        """Dummy method to mark all classes as present"""
-        # This is a placeholder for future functionality
-        print("Mark all present clicked")
-        # You can implement actual logic here later
-        # For example: update all classes for the selected date to present
+        self.mark_all("present", self.selected_date)
 
     def mark_all_absent(self, e):
-        """Dummy method to mark all classes as absent"""
-        # This is a placeholder for future functionality
-        print("Mark all absent clicked")
-        # You can implement actual logic here later
-        # For example: update all classes for the selected date to absent
+        self.mark_all("absent", self.selected_date)
+
+    def mark_all(self, status, start_date, end_date=None):
+        """Mark every class from start_date to end_date (inclusive) in one transaction,
+        on the DB executor's writer thread. Returns its future."""
+        end_date = end_date or start_date
+        start_date = max(start_date, self.sem_date)
+
+        days = []
+        current_date = start_date
+        while current_date <= end_date:
+            if not self.holidays.is_holiday(current_date):
+                days.append((current_date.isoformat(), status, current_date.strftime("%A")))
+            current_date += datetime.timedelta(days=1)
+
+        # The cards are greyed out now; the rows follow on the writer thread
+        timetable = self.timetable()
+        for date, _, day in days:
+            self._marked[date] = {(row[0], row[3]) for row in timetable.get(day, [])}
+        if start_date <= self.selected_date <= end_date:
+            for card, present_btn, absent_btn in self.class_cards:
+                self.mark_card(card, present_btn, absent_btn)
+            self.page.update()
+
+        # Nothing left to redraw
+        return self.write_later(self.write_mark_all, days)
+
+    def write_mark_all(self, days):
+        # Pending taps are older than this, so write them first and let the bulk mark win
+        self.attendance_queue.flush()
+
+        with self.db.transaction() as conn:
+            # One set-based upsert per day: every slot scheduled on that weekday
+            conn.executemany(
+                """INSERT INTO attendance_events (subject, timing, date, status)
+                   SELECT s.name, sl.timing, ?, ? FROM slots sl JOIN subjects s ON s.id = sl.subject_id
+                   WHERE sl.day = ?
+                   ON CONFLICT (subject, timing, date) DO UPDATE SET status = excluded.status""",
+                days
+            )
+            conn.execute(v1_schema.ATTENDED_SQL, self.attended_range())
+        self.refresh_counters()
 
     def show_list_screen(self, e):
-        self.update_db()
+        self.screen = self.show_list_screen
+        self.sync()
         self.page.update()
         self.content_column.controls.clear()
 
@@ -834,4 +1131,5 @@ def main(page: ft.Page):
     tracker(page)
 
 
-ft.app(target=main)
+if __name__ == "__main__":
+    ft.app(target=main, assets_dir=str(fonts.ASSETS_DIR))
@@ -0,0 +1,118 @@
+"""Storage for the v1 tracker: one row per subject, one row per weekly slot.
+
+Older databases kept everything in a flat `attendance` table with one row per
+(subject, day, timing) slot, repeating req_attendance and both counters on
+every slot of a subject. `ensure_schema` creates the normalized tables and
+moves such a table over on first start.
+"""
+
+import sqlite3
+
+# Every slot of the timetable: (subject, req_attendance, day, timing). It only
+# changes when a course is added; the counters change with every mark and are
+# read separately, with COUNTERS_SQL
+SLOT_ROWS_SQL = """SELECT s.name, s.req_attendance, sl.day, sl.timing
+                   FROM slots sl JOIN subjects s ON s.id = sl.subject_id"""
+
+# (subject, req_attendance, classes_held, classes_attended), in the order subjects were added
+COUNTERS_SQL = "SELECT name, req_attendance, classes_held, classes_attended FROM subjects ORDER BY id"
+
+# Both counters are per slot: classes_held counts every slot on every class day
+# so far, and classes_attended counts present events from the semester start
+# (first parameter) to today or the semester's end (second), so a tap on a
+# future date isn't counted. Counts carried over from a flat table have no
+# events behind them and are added as they are (legacy_attended)
+ATTENDED_SQL = """UPDATE subjects SET classes_attended = legacy_attended + (
+                      SELECT COUNT(*) FROM attendance_events e
+                      WHERE e.subject = subjects.name AND e.status = 'present' AND e.date BETWEEN ? AND ?
+                  )"""
+
+# The flat table is kept under this name after migrating, in case it's needed again
+LEGACY_TABLE = "attendance_v1"
+
+
+def ensure_schema(conn: sqlite3.Connection):
+    # Callers run this inside a transaction
+    conn.execute("""CREATE TABLE IF NOT EXISTS subjects (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE COLLATE NOCASE,
+        req_attendance INTEGER,
+        classes_held INTEGER NOT NULL DEFAULT 0,
+        classes_attended INTEGER NOT NULL DEFAULT 0,
+        legacy_attended INTEGER NOT NULL DEFAULT 0
+    )""")
+    add_legacy_attended(conn)
+    conn.execute("""CREATE TABLE IF NOT EXISTS slots (
+        id INTEGER PRIMARY KEY,
+        subject_id INTEGER NOT NULL REFERENCES subjects (id) ON DELETE CASCADE,
+        day TEXT NOT NULL,
+        timing TEXT,
+        UNIQUE (subject_id, day, timing)
+    )""")
+    conn.execute("""CREATE TABLE IF NOT EXISTS meta (
+        key text PRIMARY KEY,
+        value text
+    )""")
+    # One row per class per date; the latest tap for a class wins
+    conn.execute("""CREATE TABLE IF NOT EXISTS attendance_events (
+        subject text,
+        timing text,
+        date text,
+        status text,
+        PRIMARY KEY (subject, timing, date)
+    )""")
+    # The home screen lists the slots of one weekday in timing order
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_slots_day ON slots (day, timing)")
+    migrate_flat_attendance(conn)
+
+
+def has_flat_attendance(conn: sqlite3.Connection) -> bool:
+    # False if there's no attendance table, or it's the DBOps one
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(attendance)")}
+    return "subject" in columns
+
+
+def add_legacy_attended(conn: sqlite3.Connection) -> bool:
+    """Add subjects.legacy_attended to a database migrated before it existed, taking
+    the counts from the flat table kept as LEGACY_TABLE; returns True if it did"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(subjects)")}
+    if "legacy_attended" in columns:
+        return False
+
+    conn.execute("ALTER TABLE subjects ADD COLUMN legacy_attended INTEGER NOT NULL DEFAULT 0")
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (LEGACY_TABLE,)).fetchone():
+        # The first slot of a subject had its settings, as in migrate_flat_attendance
+        conn.execute(f"""UPDATE subjects SET legacy_attended = COALESCE((
+                             SELECT a.classes_attended FROM {LEGACY_TABLE} a
+                             WHERE subjects.name = a.subject AND a.day IS NOT NULL ORDER BY a.rowid LIMIT 1
+                         ), 0)""")
+    conn.execute("DELETE FROM meta WHERE key = 'classes_held_recomputed'")
+    return True
+
+
+def migrate_flat_attendance(conn: sqlite3.Connection) -> bool:
+    """Move a v1 flat `attendance` table into subjects/slots; returns True if it did"""
+    if not has_flat_attendance(conn):
+        return False
+
+    # Subjects that only differ in case were counted together by classes_held,
+    # so they become one subject. The first slot's settings win, as before.
+    # Attended counts have no events behind them, so they're kept as a baseline
+    conn.execute("""INSERT OR IGNORE INTO subjects (name, req_attendance, classes_held, classes_attended, legacy_attended)
+                    SELECT subject, req_attendance, COALESCE(classes_held, 0), COALESCE(classes_attended, 0),
+                           COALESCE(classes_attended, 0)
+                    FROM attendance WHERE subject IS NOT NULL AND day IS NOT NULL ORDER BY rowid""")
+    conn.execute("""INSERT OR IGNORE INTO slots (subject_id, day, timing)
+                    SELECT s.id, a.day, a.timing FROM attendance a JOIN subjects s ON s.name = a.subject
+                    WHERE a.day IS NOT NULL ORDER BY a.rowid""")
+    # Events are keyed by subject name, so use the name the subject was kept under
+    conn.execute("""UPDATE OR REPLACE attendance_events SET subject = (
+                        SELECT s.name FROM subjects s WHERE s.name = attendance_events.subject
+                    ) WHERE EXISTS (SELECT 1 FROM subjects s WHERE s.name = attendance_events.subject)""")
+
+    conn.execute("DROP INDEX IF EXISTS idx_v1_attendance_day")
+    conn.execute("DROP INDEX IF EXISTS idx_v1_attendance_subject")
+    conn.execute(f"ALTER TABLE attendance RENAME TO {LEGACY_TABLE}")
+    # Held counts are recomputed from the new tables on the next start
+    conn.execute("DELETE FROM meta WHERE key = 'classes_held_recomputed'")
+    return True
@@ -0,0 +1,71 @@
+import atexit
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class WriteBehindQueue:
+    """Buffers writes in memory and hands them to `writer` as one batch.
+
+    Writes for the same key are coalesced, so only the last value is written.
+    The batch is flushed `delay` seconds after the last put (debounce), or
+    straight away when flush() is called, e.g. on a screen change. Anything
+    still pending when the interpreter exits is flushed by an atexit hook.
+
+    The debounced flush is passed to `schedule`, e.g. a DBExecutor's
+    submit_write so it runs on the writer thread; by default it runs on the
+    timer's own thread.
+    """
+
+    def __init__(self, writer: Callable[[List[Tuple[Hashable, Any]]], None], delay: float = 0.5,
+                 schedule: Optional[Callable[[Callable[[], None]], Any]] = None):
+        self._writer = writer
+        self._delay = delay
+        self._schedule = schedule
+        self._pending: Dict[Hashable, Any] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._pending[key] = value
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self._delay, self._flush_later)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _flush_later(self):
+        if self._schedule is None:
+            self.flush()
+        else:
+            self._schedule(self.flush)
+
+    def pending(self) -> Dict[Hashable, Any]:
+        with self._lock:
+            return dict(self._pending)
+
+    def flush(self):
+        # Only one batch is written at a time so batches land in order
+        with self._flush_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                items = list(self._pending.items())
+                self._pending.clear()
+            if not items:
+                return
+            try:
+                self._writer(items)
+            except Exception:
+                # Keep the batch for the next flush, unless a newer value has arrived meanwhile
+                with self._lock:
+                    for key, value in items:
+                        self._pending.setdefault(key, value)
+                raise
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.flush)